@@ -0,0 +1,109 @@
+"""A local stand-in for the Groq chat completions API.
+
+Answers each GroqService prompt with a plausible canned response after a
+configurable latency plus uniform jitter, so the app can be exercised
+end to end without spending credits. Point the app at it with
+GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+    python -m benchmarks.fake_groq [--port 8765] [--latency-ms 300] [--jitter-ms 100]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from services.prompts import PROMPTS
+
+METHODS_BY_SYSTEM_PROMPT = {prompt.system: prompt.name for prompt in PROMPTS.values()}
+INJURY_WORDS = re.compile(r"\b(bruis\w*|cut|wound\w*|injur\w*|pain\w*|bleed\w*|swell\w*|swollen|fell|fall|fracture\w*)\b", re.I)
+
+
+def fake_content(method, user_content):
+    if method == "check_grammar":
+        return user_content.replace(" is ", " was ").replace(" are ", " were ")
+    if method == "event_analysis":
+        injury = bool(INJURY_WORDS.search(user_content))
+        return json.dumps({
+            "has_injury_risk": injury,
+            "risk_percentage": 70 if injury else 10,
+            "risk_reasoning": "Stand-in assessment.",
+            "injury_mentioned": injury,
+            "mention_details": "Stand-in" if injury else "None found",
+            "classification": "accident" if injury else "incident",
+            "classification_reason": "Stand-in classification.",
+        })
+    if method == "summarize_scenario":
+        return (
+            "1. **Title**: Stand-in report\n"
+            "2. **Descriptive Summary**: " + " ".join(user_content.split()[:150]) + "\n"
+            "3. **Key Findings**: Stand-in findings.\n"
+            "4. **Action Taken**: Stand-in actions."
+        )
+    return user_content
+
+
+def create_app(latency_ms=300.0, jitter_ms=100.0):
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        messages = body["messages"]
+        method = METHODS_BY_SYSTEM_PROMPT.get(messages[0]["content"], "unknown")
+        content = fake_content(method, messages[-1]["content"])
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        completion_tokens = len(content) // 4
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if body.get("stream"):
+            async def chunks():
+                for i in range(0, len(content), 16):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                        "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.jitter_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
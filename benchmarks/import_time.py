@@ -0,0 +1,63 @@
+"""Measure how long importing the API takes, and fail if it exceeds a budget.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+reports the total and the slowest imports by cumulative time, and checks
+that no module from the voice stack was loaded.
+
+    python -m benchmarks.import_time [--module main] [--top 15] [--budget-ms 1500]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only SpeechService should ever load these
+VOICE_MODULES = ("azure", "streamlit")
+
+
+def measure(module):
+    """Return [(cumulative_us, self_us, name)] for every module imported by `import module`."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500")))
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cumulative for cumulative, _, name in rows if name.strip() == args.module) / 1000
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+    voice = sorted({name.strip() for _, _, name in rows if name.strip().split(".")[0] in VOICE_MODULES})
+    print(f"\nimport {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms), {len(rows)} modules")
+    failed = False
+    if voice:
+        print(f"voice stack loaded: {', '.join(voice)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
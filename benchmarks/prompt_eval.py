@@ -0,0 +1,93 @@
+"""Compare the full and lean check_grammar prompts on the conversation_history corpus.
+
+Sends every answer that GrammarFastPath would pass to the LLM through both
+prompt variants and reports how often the corrections match, their average
+word-level similarity, and the prompt tokens each variant costs. Needs
+GROQ_API_KEY; --report prints the token counts without calling Groq.
+
+    python -m benchmarks.prompt_eval [--temperature 0] [--show-diffs] [--report]
+"""
+import argparse
+import asyncio
+import difflib
+import os
+
+from benchmarks.serializer_benchmark import load_corpus
+from services.grammar_fastpath import GrammarFastPath
+from services.groq_client import ResilientGroqClient
+from services.prompts import count_tokens, get_prompt, token_report
+
+
+def corpus_answers(conversations):
+    fastpath = GrammarFastPath(max_words=int(os.getenv("GRAMMAR_FASTPATH_MAX_WORDS", "3")))
+    answers = []
+    for conversation in conversations:
+        for answer in conversation.get("responses", {}).values():
+            answer = answer.strip()
+            if answer and answer not in answers and fastpath.correct(answer) is None:
+                answers.append(answer)
+    return answers
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a.lower().split(), b.lower().split()).ratio()
+
+
+async def correct_all(client, prompt, answers, temperature):
+    async def correct(answer):
+        response = await client.create(
+            "check_grammar",
+            messages=prompt.messages(text=answer),
+            model=prompt.model,
+            temperature=temperature,
+        )
+        return response.choices[0].message.content.strip()
+
+    return await asyncio.gather(*(correct(answer) for answer in answers))
+
+
+async def evaluate(answers, temperature, show_diffs):
+    full, lean = get_prompt("check_grammar", "full"), get_prompt("check_grammar", "lean")
+    client = ResilientGroqClient.from_env()
+    try:
+        full_outputs = await correct_all(client, full, answers, temperature)
+        lean_outputs = await correct_all(client, lean, answers, temperature)
+    finally:
+        await client.close()
+
+    matches = sum(a == b for a, b in zip(full_outputs, lean_outputs))
+    scores = [similarity(a, b) for a, b in zip(full_outputs, lean_outputs)]
+    print(f"{len(answers)} answers sent to the LLM, temperature {temperature}")
+    print(f"exact match:        {matches}/{len(answers)} ({matches / len(answers):.0%})")
+    print(f"mean similarity:    {sum(scores) / len(scores):.3f}")
+    print(f"min similarity:     {min(scores):.3f}")
+    print(f"system tokens:      full {count_tokens(full.system)}, lean {count_tokens(lean.system)}")
+    if show_diffs:
+        for answer, a, b, score in zip(answers, full_outputs, lean_outputs, scores):
+            if a != b:
+                print(f"\n[{score:.2f}] {answer}\n  full: {a}\n  lean: {b}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--temperature", type=float, default=0.0,
+                        help="sampling temperature for both variants (0 keeps the comparison deterministic)")
+    parser.add_argument("--show-diffs", action="store_true", help="print every answer where the variants differ")
+    parser.add_argument("--report", action="store_true", help="only print the prompt token report")
+    args = parser.parse_args()
+
+    for row in token_report():
+        print(f"{row['prompt']:<32} {row['system_tokens']:>6} system tokens")
+    if args.report:
+        return
+
+    answers = corpus_answers(load_corpus())
+    if not answers:
+        print("No answers in the corpus need the LLM.")
+        return
+    print()
+    asyncio.run(evaluate(answers, args.temperature, args.show_diffs))
+
+
+if __name__ == "__main__":
+    main()
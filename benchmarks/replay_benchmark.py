@@ -0,0 +1,281 @@
+"""Replay the conversation_history corpus through the API without spending Groq credits.
+
+Starts benchmarks.fake_groq in a subprocess, points the app at it and at
+fakeredis (or a real Redis), then drives every conversation through
+/start-conversation, /ask-question until the summary, and
+/stop-conversation, with N conversations in flight at once. Reports
+p50/p95/p99 latency per flow step, requests per second, and Redis
+commands and round trips per turn.
+
+Save a run with --save-baseline, and fail later runs that regress against
+it with --baseline: exit status 1 if any step's latency (--metric, p50 by
+default) or the Redis commands per turn grow, or the throughput drops, by
+more than --tolerance.
+
+    python -m benchmarks.replay_benchmark [--concurrency 8] [--repeat 5]
+        [--latency-ms 300] [--jitter-ms 100] [--redis fake|redis://...]
+        [--save-baseline FILE] [--baseline FILE] [--tolerance 0.2] [--metric p50]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.serializer_benchmark import load_corpus
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Answer for questions a replayed conversation never saw, such as a branch the stand-in took
+DEFAULT_ANSWER = "no"
+MAX_TURNS = 50
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def fake_groq_server(latency_ms, jitter_ms):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_groq", "--port", str(port),
+         "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms)],
+        cwd=ROOT_DIR,
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("fake Groq server did not start")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class RedisOpCounter:
+    """Counts Redis commands and network round trips made through redis-py's asyncio client."""
+
+    def __init__(self):
+        self.commands = 0
+        self.round_trips = 0
+
+    def install(self):
+        from redis.asyncio.client import Pipeline, Redis
+
+        counter = self
+        execute_command = Redis.execute_command
+        immediate_execute_command = Pipeline.immediate_execute_command
+        pipeline_execute = Pipeline.execute
+
+        async def counted_execute_command(self, *args, **options):
+            counter.commands += 1
+            counter.round_trips += 1
+            return await execute_command(self, *args, **options)
+
+        async def counted_immediate_execute_command(self, *args, **options):
+            counter.commands += 1
+            counter.round_trips += 1
+            return await immediate_execute_command(self, *args, **options)
+
+        async def counted_pipeline_execute(self, *args, **options):
+            if self.command_stack:
+                counter.commands += len(self.command_stack)
+                counter.round_trips += 1
+            return await pipeline_execute(self, *args, **options)
+
+        Redis.execute_command = counted_execute_command
+        Pipeline.immediate_execute_command = counted_immediate_execute_command
+        Pipeline.execute = counted_pipeline_execute
+
+    def reset(self):
+        self.commands = 0
+        self.round_trips = 0
+
+
+def use_fakeredis():
+    try:
+        import fakeredis
+    except ImportError:
+        raise SystemExit("--redis fake needs the fakeredis package (pip install fakeredis lupa)")
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+    redis.asyncio.from_url = lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server, **kwargs)
+    return "redis://fakeredis"
+
+
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def replay(client, flow, conversation, timings):
+    started = time.perf_counter()
+    response = await client.post("/start-conversation")
+    response.raise_for_status()
+    timings.setdefault("start", []).append(time.perf_counter() - started)
+    conversation_id = response.json()["conversation_id"]
+    question = response.json()["first_question"]
+
+    turns = 0
+    while question and turns < MAX_TURNS:
+        step = flow.step_for_question(question)
+        answer = conversation["responses"].get(question, DEFAULT_ANSWER)
+        started = time.perf_counter()
+        response = await client.post(f"/ask-question/{conversation_id}", json={"question": question, "response": answer})
+        response.raise_for_status()
+        timings.setdefault(step.id if step else "unknown", []).append(time.perf_counter() - started)
+        question = response.json()["next_question"]
+        turns += 1
+
+    response = await client.post(f"/stop-conversation/{conversation_id}")
+    response.raise_for_status()
+    return turns
+
+
+async def run(app, conversations, concurrency, counter):
+    from services.conversation_flow import DEFAULT_FLOW_ID, FLOWS
+
+    flow = FLOWS[DEFAULT_FLOW_ID]
+    timings = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+            async def replay_one(conversation):
+                async with semaphore:
+                    return await replay(client, flow, conversation, timings)
+
+            # Warm up connection pools with one untimed round at full concurrency
+            await asyncio.gather(*(replay(client, flow, conversation, {}) for conversation in conversations[:concurrency]))
+
+            counter.reset()
+            started = time.perf_counter()
+            turns = sum(await asyncio.gather(*(replay_one(conversation) for conversation in conversations)))
+            elapsed = time.perf_counter() - started
+
+    requests = sum(len(values) for values in timings.values()) + len(conversations)  # plus the stops
+    return {
+        "conversations": len(conversations),
+        "turns": turns,
+        "seconds": elapsed,
+        "rps": requests / elapsed,
+        "turns_per_second": turns / elapsed,
+        "redis_commands_per_turn": counter.commands / turns if turns else 0.0,
+        "redis_round_trips_per_turn": counter.round_trips / turns if turns else 0.0,
+        "steps": {
+            step: {
+                "count": len(values),
+                "p50_ms": percentile(sorted(values), 50) * 1000,
+                "p95_ms": percentile(sorted(values), 95) * 1000,
+                "p99_ms": percentile(sorted(values), 99) * 1000,
+            }
+            for step, values in timings.items()
+        },
+    }
+
+
+def report(results):
+    print(f"{results['conversations']} conversations, {results['turns']} turns in {results['seconds']:.2f}s")
+    print(f"{'step':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, stats in results["steps"].items():
+        print(f"{step:<20} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    print(f"\nrequests/s: {results['rps']:.1f}   turns/s: {results['turns_per_second']:.1f}")
+    print(f"redis commands/turn: {results['redis_commands_per_turn']:.2f}   "
+          f"round trips/turn: {results['redis_round_trips_per_turn']:.2f}")
+
+
+def regressions(results, baseline, tolerance, min_delta_ms, metric="p50"):
+    found = []
+    key = f"{metric}_ms"
+    for step, stats in baseline["steps"].items():
+        current = results["steps"].get(step)
+        # Steps that never reach the LLM take a few ms, where relative noise is large
+        if (current and current[key] > stats[key] * (1 + tolerance)
+                and current[key] - stats[key] > min_delta_ms):
+            found.append(f"{step} {metric} {current[key]:.1f} ms > baseline {stats[key]:.1f} ms")
+    if results["rps"] < baseline["rps"] * (1 - tolerance):
+        found.append(f"requests/s {results['rps']:.1f} < baseline {baseline['rps']:.1f}")
+    if results["redis_commands_per_turn"] > baseline["redis_commands_per_turn"] * (1 + tolerance):
+        found.append(
+            f"redis commands/turn {results['redis_commands_per_turn']:.2f} "
+            f"> baseline {baseline['redis_commands_per_turn']:.2f}"
+        )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8, help="conversations in flight at once")
+    parser.add_argument("--repeat", type=int, default=5, help="times to replay the corpus")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--redis", default="fake", help="'fake' for fakeredis, or a Redis URL")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on (off by default)")
+    parser.add_argument("--save-baseline", metavar="FILE")
+    parser.add_argument("--baseline", metavar="FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--metric", choices=("p50", "p95", "p99"), default="p50",
+                        help="latency percentile compared against the baseline (tail percentiles are noisier)")
+    parser.add_argument("--min-delta-ms", type=float, default=25.0,
+                        help="ignore p95 increases smaller than this, however large relatively")
+    args = parser.parse_args()
+
+    conversations = load_corpus() * args.repeat
+    with fake_groq_server(args.latency_ms, args.jitter_ms) as groq_url:
+        os.environ.update({
+            "GROQ_API_KEY": "replay",
+            "GROQ_BASE_URL": groq_url,
+            "REDIS_URL": use_fakeredis() if args.redis == "fake" else args.redis,
+            "LLM_CACHE": "true" if args.llm_cache else "false",
+            "REPORT_ARCHIVE": "false",
+        })
+        import main as api
+
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        counter = RedisOpCounter()
+        counter.install()
+        results = asyncio.run(run(api.app, conversations, args.concurrency, counter))
+
+    results["config"] = {
+        "concurrency": args.concurrency, "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms, "redis": args.redis, "llm_cache": args.llm_cache,
+    }
+    report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nbaseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print(f"\nwarning: baseline was recorded with {baseline.get('config')}")
+        found = regressions(results, baseline, args.tolerance, args.min_delta_ms, args.metric)
+        if found:
+            print("\nregressions against baseline:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
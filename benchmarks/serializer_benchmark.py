@@ -0,0 +1,72 @@
+"""Compare conversation serializers on the conversation_history corpus.
+
+Times encoding every conversation to Redis hash fields and decoding it
+back, and reports the stored size, for each available serializer.
+
+    python -m benchmarks.serializer_benchmark [--rounds 2000]
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from services.conversation_store import decode_fields, encode_fields, fields_size
+from services.serializers import SERIALIZERS, VersionedSerializer
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "conversation_history")
+
+
+def load_corpus():
+    conversations = []
+    for path in sorted(glob.glob(os.path.join(HISTORY_DIR, "*.json"))):
+        with open(path) as f:
+            conversations.append(json.load(f))
+    return conversations
+
+
+def run(serializer, conversations, rounds):
+    encoded = [encode_fields(conversation, serializer=serializer) for conversation in conversations]
+    for conversation, fields in zip(conversations, encoded):
+        assert decode_fields(fields, serializer) == conversation, "round trip changed the conversation"
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for conversation in conversations:
+            encode_fields(conversation, serializer=serializer)
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for fields in encoded:
+            decode_fields(fields, serializer)
+    decode_time = time.perf_counter() - start
+
+    operations = rounds * len(conversations)
+    return {
+        "encode_us": encode_time / operations * 1e6,
+        "decode_us": decode_time / operations * 1e6,
+        "bytes": sum(fields_size(fields) for fields in encoded) / len(encoded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    conversations = load_corpus()
+    print(f"{len(conversations)} conversations, {args.rounds} rounds")
+    print(f"{'serializer':<10} {'encode us':>10} {'decode us':>10} {'bytes':>8}")
+    for name in SERIALIZERS:
+        try:
+            serializer = VersionedSerializer(name)
+        except ImportError as e:
+            print(f"{name:<10} skipped: {e}")
+            continue
+        result = run(serializer, conversations, args.rounds)
+        print(f"{name:<10} {result['encode_us']:>10.1f} {result['decode_us']:>10.1f} {result['bytes']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
@@ -5,15 +6,33 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class MongoDBClient:
-    def __init__(self):
-        self.mongo_uri = os.getenv("MONGODB_URI")
+    def __init__(self, mongo_uri=None, mock=None):
+        self.mongo_uri = mongo_uri or os.getenv("MONGODB_URI")
+        if mock is None:
+            # An in-process stand-in for local runs and tests
+            mock = os.getenv("MONGODB_MOCK", "false").lower() == "true"
         if not self.mongo_uri:
-            raise ValueError("MONGODB_URI environment variable not set")
+            if not mock:
+                raise ValueError("MONGODB_URI environment variable not set")
+            self.mongo_uri = "mongodb://localhost/care_home"
 
         try:
-            self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
-            self.client.server_info()  # Force connection to check for issues
+            if mock:
+                import mongomock
+                self.client = mongomock.MongoClient(self.mongo_uri)
+            else:
+                self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
+                self.client.server_info()  # Force connection to check for issues
             self.db = self.client.get_default_database()
         except Exception as e:
             print(f"Error connecting to MongoDB: {e}")
             raise
+
+    def close(self):
+        self.client.close()
+
+
+@lru_cache(maxsize=None)
+def reports_collection():
+    """The collection archived reports live in, on one client shared by the whole process."""
+    return MongoDBClient().db[os.getenv("MONGODB_REPORTS_COLLECTION", "reports")]
@@ -1,7 +1,18 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from services.conversation_manager import ConversationManager
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from services.conversation_manager import ConversationManager, ConversationConflictError, UnexpectedQuestionError
+from services.groq_client import GroqRequestError, GroqUnavailableError
+from services.transcript_store import TranscriptStore, register_local_store
+from services.report_queries import InvalidCursorError, ReportQueries
+from services.metrics import configure_tracing, register_stats_collector
+from services.structured_logging import configure_logging
+import json
 import logging
 import os
 import uvicorn
@@ -10,8 +21,36 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
-conversation_manager = ConversationManager()
+configure_logging()
+logger = logging.getLogger(__name__)
+configure_tracing()
+
+# Created in lifespan so importing the app does not build clients or touch Redis
+conversation_manager = None
+transcript_store = None
+report_queries = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global conversation_manager, transcript_store, report_queries
+    conversation_manager = ConversationManager()
+    report_queries = ReportQueries.from_env()
+    transcript_store = TranscriptStore(
+        max_entries=int(os.getenv("TRANSCRIPT_STORE_MAX_ENTRIES", "10000")),
+        ttl=int(os.getenv("TRANSCRIPT_TTL", "3600"))
+    )
+    await conversation_manager.initialize()
+    if conversation_manager.redis_client:
+        transcript_store.use_redis(conversation_manager.redis_client)
+    register_local_store(transcript_store)
+    stats_collector = register_stats_collector(conversation_manager)
+    try:
+        yield
+    finally:
+        REGISTRY.unregister(stats_collector)
+        await conversation_manager.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -22,19 +61,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 class UserResponse(BaseModel):
     question: str
     response: str
 
+class BatchAnswers(BaseModel):
+    answers: List[UserResponse] = Field(..., min_length=1, max_length=50)
+
+class StartConversation(BaseModel):
+    resident_id: Optional[str] = None
+    resident_name: Optional[str] = None
+
+# How each error a turn can raise is reported, checked in order
+TURN_ERRORS = (
+    (ValueError, 404, None),
+    (ConversationConflictError, 409, None),
+    (UnexpectedQuestionError, 409, None),
+    (GroqUnavailableError, 503, "Language model is temporarily unavailable, please retry."),
+    (GroqRequestError, 502, None),
+)
+TURN_ERROR_TYPES = tuple(error_type for error_type, _, _ in TURN_ERRORS)
+
+def turn_error(error):
+    """Log an error raised by a turn and return the HTTPException reporting it."""
+    logger.error(f"Error: {error}")
+    for error_type, status_code, detail in TURN_ERRORS:
+        if isinstance(error, error_type):
+            return HTTPException(status_code=status_code, detail=detail or str(error))
+
 @app.post("/start-conversation")
-def start_conversation():
-    """Start a new conversation and return the first question."""
+async def start_conversation(start: Optional[StartConversation] = None):
+    """Start a new conversation and return the first question.
+
+    The optional body names the resident the report is about; it is used in
+    the summary and lets archived reports be listed by resident_id.
+    """
+    start = start or StartConversation()
     try:
-        conversation_id = conversation_manager.create_new_conversation()
-        first_question = conversation_manager.start_conversation(conversation_id)
+        conversation_id = await conversation_manager.create_new_conversation(start.resident_id, start.resident_name)
+        first_question = await conversation_manager.start_conversation(conversation_id)
         return {
             "conversation_id": conversation_id,
             "first_question": first_question
@@ -44,10 +109,10 @@ def start_conversation():
         raise HTTPException(status_code=500, detail="Failed to start conversation.")
 
 @app.post("/ask-question/{conversation_id}")
-def ask_question(conversation_id: str, user_response: UserResponse):
+async def ask_question(conversation_id: str, user_response: UserResponse):
     """Process a user's response and return the next question, analysis, or summary."""
     try:
-        response_data = conversation_manager.handle_question(
+        response_data = await conversation_manager.handle_question(
             conversation_id, user_response.question, user_response.response
         )
 
@@ -57,20 +122,126 @@ def ask_question(conversation_id: str, user_response: UserResponse):
             "summary": response_data.get("summary"),
             "corrected_response": response_data.get("corrected_response"),
         }
-    except ValueError as ve:
-        logger.error(f"Error: {ve}")
-        raise HTTPException(status_code=404, detail=str(ve))
+    except TURN_ERROR_TYPES as e:
+        raise turn_error(e)
+
+@app.post("/ask-question/{conversation_id}/stream")
+async def ask_question_stream(conversation_id: str, user_response: UserResponse):
+    """Process a user's response, streaming the summary as newline-delimited JSON.
+
+    Each line is either {"summary_delta": "..."} while the summary is being
+    generated, or the final result with the same fields as /ask-question.
+    If the turn fails after the stream has started, the last line is
+    {"error": "..."} and nothing from the turn is saved.
+    """
+    if not await conversation_manager.get_conversation(conversation_id):
+        logger.error("Error: Conversation not found.")
+        raise HTTPException(status_code=404, detail="Conversation not found.")
+
+    async def events():
+        try:
+            async for event in conversation_manager.handle_question_stream(
+                conversation_id, user_response.question, user_response.response
+            ):
+                yield json.dumps(event) + "\n"
+        except TURN_ERROR_TYPES as e:
+            yield json.dumps({"error": turn_error(e).detail}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/conversations/{conversation_id}/answers:batch")
+async def answer_batch(conversation_id: str, batch: BatchAnswers):
+    """Process a whole form of answers at once.
+
+    Grammar checks run concurrently, so the latency is that of the slowest
+    answer plus the summary rather than the sum of every call. Returns the
+    corrected answers in order with the resulting next question, analysis
+    and summary.
+    """
+    try:
+        return await conversation_manager.handle_answers_batch(
+            conversation_id, [(answer.question, answer.response) for answer in batch.answers]
+        )
+    except TURN_ERROR_TYPES as e:
+        raise turn_error(e)
 
 @app.post("/stop-conversation/{conversation_id}")
-def stop_conversation(conversation_id: str):
+async def stop_conversation(conversation_id: str):
     """Stop a conversation."""
     try:
-        conversation_manager.stop_conversation(conversation_id)
+        await conversation_manager.stop_conversation(conversation_id)
         return {"message": "Conversation stopped successfully."}
     except ValueError as ve:
         logger.error(f"Error: {ve}")
         raise HTTPException(status_code=404, detail=str(ve))
 
+@app.get("/reports")
+async def list_reports(
+    resident_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    scenario_type: Optional[str] = None,
+    classification: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """List archived reports newest first, without their responses or summary.
+
+    Pass the returned next_cursor as cursor to fetch the following page.
+    """
+    if report_queries is None:
+        raise HTTPException(status_code=503, detail="Report archive is not configured.")
+    filters = {
+        "resident_id": resident_id,
+        "event_type": event_type,
+        "scenario_type": scenario_type,
+        "classification": classification,
+        "status": status,
+    }
+    try:
+        reports, next_cursor = await report_queries.list_reports(filters, date_from, date_to, cursor, limit)
+    except InvalidCursorError as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    return {"reports": reports, "next_cursor": next_cursor}
+
+@app.get("/reports/{conversation_id}")
+async def get_report(conversation_id: str):
+    """Return one archived report in full."""
+    if report_queries is None:
+        raise HTTPException(status_code=503, detail="Report archive is not configured.")
+    report = await report_queries.get_report(conversation_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found.")
+    return report
+
+# Voice transcript routes called by the browser speech SDK and polled by SpeechService
+
+@app.get("/set-user-text/")
+async def set_user_text(conversation_id: str, text: str = ""):
+    return await transcript_store.set_text(conversation_id, text)
+
+@app.get("/get-user-text/")
+async def get_user_text(conversation_id: str):
+    return await transcript_store.get_text(conversation_id)
+
+@app.get("/reset-user-text/")
+async def reset_user_text(conversation_id: str):
+    return await transcript_store.reset_text(conversation_id)
+
+@app.get("/set-is-speaking/")
+async def set_is_speaking(conversation_id: str, is_speaking: bool):
+    return await transcript_store.set_speaking(conversation_id, is_speaking)
+
+@app.get("/get-is-speaking/")
+async def get_is_speaking(conversation_id: str):
+    return await transcript_store.get_speaking(conversation_id)
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8080"))
     uvicorn.run("main:app", host="0.0.0.0", port=port)
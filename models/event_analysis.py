@@ -0,0 +1,53 @@
+import re
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+PERCENT_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+class EventAnalysis(BaseModel):
+    """Structured result of GroqService.event_analysis, as returned by the model in JSON mode.
+
+    Every field is required, so a reply that leaves one out or uses other
+    key names fails validation, and the turn fails, instead of being read
+    as a harmless incident.
+    """
+
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+    has_injury_risk: bool = Field(...)
+    risk_percentage: float = Field(..., ge=0, le=100)
+    risk_reasoning: str = Field(...)
+    injury_mentioned: bool = Field(...)
+    mention_details: str = Field(...)
+    classification: Literal["incident", "accident"] = Field(...)
+    classification_reason: str = Field(...)
+
+    @field_validator("risk_percentage", mode="before")
+    @classmethod
+    def parse_percentage(cls, value):
+        # Models sometimes answer "85%" or a range like "60-80"; take the highest figure
+        if isinstance(value, str):
+            numbers = [float(number) for number in PERCENT_PATTERN.findall(value)]
+            if not numbers:
+                raise ValueError("risk_percentage has no number")
+            value = max(numbers)
+        return min(max(float(value), 0.0), 100.0)
+
+    @field_validator("classification", mode="before")
+    @classmethod
+    def parse_classification(cls, value):
+        return str(value).strip().lower()
+
+    def to_result(self) -> dict:
+        """The dict shape the conversation manager and flow conditions read."""
+        return {
+            "has_injury": self.has_injury_risk,
+            "likelihood": self.risk_percentage,
+            "reasoning": self.risk_reasoning,
+            "injury_mentioned": self.injury_mentioned,
+            "mention_details": self.mention_details,
+            "classification": self.classification,
+            "classification_reason": self.classification_reason,
+        }
@@ -1,32 +1,167 @@
-import requests
+import asyncio
+import logging
 import os
+from urllib.parse import urlparse
+
+import httpx
+import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from services.transcript_store import local_store
 
 load_dotenv()
 
-def reset_user_transcript(conversation_id):
-    url = f"{os.getenv('VOICE_TRANSCRIPT_API_ENDPOINT')}/reset-user-text/?conversation_id={conversation_id}"
+logger = logging.getLogger(__name__)
+
+
+def _settings(endpoint=None, timeout=None, connect_timeout=None, pool_size=None):
+    """Resolve the transcript service settings once, from arguments or the environment."""
+    return (
+        (endpoint or os.getenv("VOICE_TRANSCRIPT_API_ENDPOINT") or "").rstrip("/"),
+        timeout if timeout is not None else float(os.getenv("VOICE_TRANSCRIPT_TIMEOUT", "5")),
+        connect_timeout if connect_timeout is not None else float(os.getenv("VOICE_TRANSCRIPT_CONNECT_TIMEOUT", "2")),
+        pool_size if pool_size is not None else int(os.getenv("VOICE_TRANSCRIPT_POOL_SIZE", "10")),
+    )
+
+
+def _is_local(endpoint):
+    """The transcript routes are served by this app when the endpoint is unset, "local" or this host."""
+    if endpoint in ("", "local"):
+        return True
+    return urlparse(endpoint).hostname in ("localhost", "127.0.0.1", "0.0.0.0")
+
+
+def _running_loop():
     try:
-        requests.get(url, timeout=5)
-    except requests.RequestException as e:
-        print(f"Error resetting transcript: {e}")
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class TranscriptClient:
+    """Client for the voice transcript service that keeps its connections alive between polls.
+
+    When the transcript routes are hosted by this process, calls go straight
+    to its TranscriptStore instead of over HTTP. Code running on the event
+    loop must use AsyncTranscriptClient; calls from there return the default.
+    """
+
+    def __init__(self, endpoint=None, timeout=None, connect_timeout=None, pool_size=None):
+        self.endpoint, read_timeout, connect_timeout, pool_size = _settings(
+            endpoint, timeout, connect_timeout, pool_size
+        )
+        self.timeout = (connect_timeout, read_timeout)
+        self.local = _is_local(self.endpoint)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, path, method, conversation_id, action):
+        store = local_store() if self.local else None
+        if store is not None:
+            if _running_loop() is store.loop:
+                # Blocking here would stall the loop that serves the store (and its HTTP
+                # routes) until the timeout, so answer with the default straight away
+                logger.error("Error %s: blocking TranscriptClient called on the event loop; use AsyncTranscriptClient", action)
+                return None
+            try:
+                future = asyncio.run_coroutine_threadsafe(getattr(store, method)(conversation_id), store.loop)
+                return future.result(self.timeout[1])
+            except Exception as e:
+                logger.error("Error %s: %s", action, e)
+                return None
+        try:
+            response = self.session.get(
+                f"{self.endpoint}/{path}/", params={"conversation_id": conversation_id}, timeout=self.timeout
+            )
+            if response.status_code == 200:
+                return response.json()
+            logger.warning("Transcript service returned %s while %s", response.status_code, action)
+        except (requests.RequestException, ValueError) as e:
+            logger.error("Error %s: %s", action, e)
+        return None
+
+    def reset_user_transcript(self, conversation_id):
+        self._get("reset-user-text", "reset_text", conversation_id, "resetting transcript")
+
+    def fetch_user_transcript(self, conversation_id):
+        return self._get("get-user-text", "get_text", conversation_id, "fetching transcript") or {
+            "conversation_id": conversation_id, "text": ""
+        }
+
+    def fetch_is_speaking(self, conversation_id):
+        return self._get("get-is-speaking", "get_speaking", conversation_id, "checking speaking status") or {
+            "conversation_id": conversation_id, "is_speaking": False
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncTranscriptClient:
+    """Async variant of TranscriptClient for use inside the event loop."""
+
+    def __init__(self, endpoint=None, timeout=None, connect_timeout=None, pool_size=None):
+        self.endpoint, read_timeout, connect_timeout, pool_size = _settings(
+            endpoint, timeout, connect_timeout, pool_size
+        )
+        self.local = _is_local(self.endpoint)
+        self.client = httpx.AsyncClient(
+            base_url=self.endpoint,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def _get(self, path, method, conversation_id, action):
+        store = local_store() if self.local else None
+        if store is not None and _running_loop() is store.loop:
+            return await getattr(store, method)(conversation_id)
+        try:
+            response = await self.client.get(f"/{path}/", params={"conversation_id": conversation_id})
+            if response.status_code == 200:
+                return response.json()
+            logger.warning("Transcript service returned %s while %s", response.status_code, action)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("Error %s: %s", action, e)
+        return None
+
+    async def reset_user_transcript(self, conversation_id):
+        await self._get("reset-user-text", "reset_text", conversation_id, "resetting transcript")
+
+    async def fetch_user_transcript(self, conversation_id):
+        return await self._get("get-user-text", "get_text", conversation_id, "fetching transcript") or {
+            "conversation_id": conversation_id, "text": ""
+        }
+
+    async def fetch_is_speaking(self, conversation_id):
+        return await self._get("get-is-speaking", "get_speaking", conversation_id, "checking speaking status") or {
+            "conversation_id": conversation_id, "is_speaking": False
+        }
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_default_client = None
+
+
+def get_transcript_client():
+    """Return the shared TranscriptClient used by the module-level functions."""
+    global _default_client
+    if _default_client is None:
+        _default_client = TranscriptClient()
+    return _default_client
+
+
+def reset_user_transcript(conversation_id):
+    get_transcript_client().reset_user_transcript(conversation_id)
+
 
 def fetch_user_transcript(conversation_id):
-    url = f"{os.getenv('VOICE_TRANSCRIPT_API_ENDPOINT')}/get-user-text/?conversation_id={conversation_id}"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching transcript: {e}")
-    return {"conversation_id": conversation_id, "text": ""}
+    return get_transcript_client().fetch_user_transcript(conversation_id)
+
 
 def fetch_is_speaking(conversation_id):
-    url = f"{os.getenv('VOICE_TRANSCRIPT_API_ENDPOINT')}/get-is-speaking/?conversation_id={conversation_id}"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            return response.json()
-    except requests.RequestException as e:
-        print(f"Error checking speaking status: {e}")
-    return {"conversation_id": conversation_id, "is_speaking": False}
+    return get_transcript_client().fetch_is_speaking(conversation_id)
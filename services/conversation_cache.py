@@ -0,0 +1,104 @@
+import json
+import time
+from collections import OrderedDict
+
+
+class ConversationCache:
+    """Bounded in-process store for active conversations.
+
+    Entries are kept in least-recently-used order and evicted when the cache
+    exceeds max_entries or max_bytes, or when they have not been touched for
+    idle_ttl seconds. Sizes are approximate: the length of the conversation's
+    serialized form when it was added, plus the size of each change saved since.
+
+    Methods that evict return the evicted (conversation_id, conversation)
+    pairs that still have unsaved changes, so the caller can write them back.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=256 * 1024 * 1024, idle_ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()  # id -> [conversation, size, last_access, dirty]
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.hydrations = 0
+
+    def __contains__(self, conversation_id):
+        return conversation_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hydrations": self.hydrations,
+        }
+
+    def get(self, conversation_id):
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+        entry[2] = time.monotonic()
+        self._entries.move_to_end(conversation_id)
+        return entry[0]
+
+    def put(self, conversation_id, conversation, size=None, dirty=True):
+        """Add or replace a conversation and return the write-backs from evictions."""
+        if size is None:
+            size = len(json.dumps(conversation))
+        self.pop(conversation_id)
+        self._entries[conversation_id] = [conversation, size, time.monotonic(), dirty]
+        self._bytes += size
+
+        evicted = self.collect_expired()
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            evicted.extend(self._evict_oldest())
+            self.evictions += 1
+        return evicted
+
+    def mark_clean(self, conversation_id, added_bytes=0):
+        """Record that the conversation's changes, of the given size, were persisted."""
+        self._mark(conversation_id, added_bytes, dirty=False)
+
+    def mark_dirty(self, conversation_id, added_bytes=0):
+        """Record that the conversation has changes that are not persisted yet."""
+        self._mark(conversation_id, added_bytes, dirty=True)
+
+    def _mark(self, conversation_id, added_bytes, dirty):
+        entry = self._entries.get(conversation_id)
+        if entry is not None:
+            entry[1] += added_bytes
+            self._bytes += added_bytes
+            entry[3] = dirty
+
+    def pop(self, conversation_id):
+        entry = self._entries.pop(conversation_id, None)
+        if entry is None:
+            return None
+        self._bytes -= entry[1]
+        return entry[0]
+
+    def collect_expired(self):
+        """Evict entries idle for longer than idle_ttl, oldest first."""
+        evicted = []
+        deadline = time.monotonic() - self.idle_ttl
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest[2] > deadline:
+                break
+            evicted.extend(self._evict_oldest())
+            self.expirations += 1
+        return evicted
+
+    def _evict_oldest(self):
+        conversation_id, (conversation, size, _, dirty) = self._entries.popitem(last=False)
+        self._bytes -= size
+        return [(conversation_id, conversation)] if dirty else []
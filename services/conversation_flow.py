@@ -0,0 +1,114 @@
+"""Declarative conversation flows, compiled once into state machines.
+
+A flow definition lists its steps by state ID. Each step has the question
+to ask, an optional action the manager runs on the answer ("analysis" or
+"summary"), the default next state, and optional branches taken when a
+named condition holds. compile_flow resolves every transition to a Step
+object up front, so advancing a conversation is a dictionary lookup.
+"""
+
+class UnexpectedQuestionError(Exception):
+    """Raised when an answer is for a question other than the conversation's current step."""
+
+
+# Conditions a branch can test, given the conversation and the corrected answer.
+CONDITIONS = {
+    "injury_risk": lambda conversation, answer: bool((conversation.get("analysis") or {}).get("has_injury")),
+    "answered_yes": lambda conversation, answer: answer.lower() == "yes",
+}
+
+INCIDENT_FLOW = {
+    "id": "incident",
+    "start": "event_type",
+    "steps": [
+        {"id": "event_type", "question": "Please select the type of event from the options below.", "next": "staff"},
+        {"id": "staff", "question": "Please provide the name of the staff member who has any information regarding the event.", "next": "location"},
+        {"id": "location", "question": "Where did the event take place?", "next": "time"},
+        {"id": "time", "question": "When did the event happen?", "next": "witnesses"},
+        {"id": "witnesses", "question": "Were there any witnesses?", "next": "details"},
+        {
+            "id": "details",
+            "question": "Please provide details of the event.",
+            "action": "analysis",
+            "branches": [("injury_risk", "injury_check")],
+            "next": "immediate_action",
+        },
+        {
+            "id": "injury_check",
+            "question": "Did the patient sustain a physical injury as a result of the event?",
+            "branches": [("answered_yes", "injury_size")],
+            "next": "immediate_action",
+        },
+        {"id": "injury_size", "question": "Please specify the size of the injury.", "next": "injury_location"},
+        {"id": "injury_location", "question": "Please specify the location of the injury.", "next": "immediate_action"},
+        {"id": "immediate_action", "question": "Please provide details of any immediate action taken.", "next": "vital_observations"},
+        {"id": "vital_observations", "question": "Would you like to add any vital observations?", "next": "recovery_action"},
+        {"id": "recovery_action", "question": "Please describe any recovery action taken and by whom?", "next": "informed"},
+        {"id": "informed", "question": "Please include a date and name of the person who was informed.", "next": "summary"},
+        {
+            "id": "summary",
+            "question": "Thank you for filling out the form. Here is a summary of the event.",
+            "action": "summary",
+            "next": None,
+        },
+    ],
+}
+
+
+class Step:
+    __slots__ = ("id", "question", "action", "next", "branches")
+
+    def __init__(self, id, question, action=None):
+        self.id = id
+        self.question = question
+        self.action = action
+        self.next = None
+        self.branches = ()
+
+
+class ConversationFlow:
+    def __init__(self, flow_id, start, steps):
+        self.id = flow_id
+        self.start = start
+        self.steps = steps
+        self._by_question = {step.question: step for step in steps.values()}
+
+    def step(self, state_id):
+        return self.steps.get(state_id)
+
+    def step_for_question(self, question):
+        return self._by_question.get(question)
+
+    def next_step(self, step, conversation, answer):
+        for condition, target in step.branches:
+            if condition(conversation, answer):
+                return target
+        return step.next
+
+
+def compile_flow(definition):
+    """Build a ConversationFlow from a definition, checking every reference."""
+    steps = {}
+    for spec in definition["steps"]:
+        if spec["id"] in steps:
+            raise ValueError(f"Duplicate step '{spec['id']}' in flow '{definition['id']}'")
+        steps[spec["id"]] = Step(spec["id"], spec["question"], spec.get("action"))
+
+    def resolve(state_id):
+        if state_id is None:
+            return None
+        if state_id not in steps:
+            raise ValueError(f"Unknown step '{state_id}' in flow '{definition['id']}'")
+        return steps[state_id]
+
+    for spec in definition["steps"]:
+        step = steps[spec["id"]]
+        step.next = resolve(spec.get("next"))
+        step.branches = tuple(
+            (CONDITIONS[condition], resolve(target)) for condition, target in spec.get("branches", ())
+        )
+    return ConversationFlow(definition["id"], resolve(definition["start"]), steps)
+
+
+FLOWS = {flow.id: flow for flow in (compile_flow(INCIDENT_FLOW),)}
+DEFAULT_FLOW_ID = INCIDENT_FLOW["id"]
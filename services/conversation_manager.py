@@ -1,234 +1,578 @@
 import uuid
-import json
-import redis
+import re
+import asyncio
+import difflib
+import logging
+import redis.asyncio as redis
 import os
+import time
+from datetime import datetime, timezone
 from services.groq_service import GroqService
+from services.conversation_cache import ConversationCache
+from services.conversation_flow import FLOWS, DEFAULT_FLOW_ID, UnexpectedQuestionError
+from services.metrics import TURN_SECONDS, current_step
+from services.structured_logging import current_conversation, log_payload
+from services.report_archiver import ReportArchiver, report_document
+from services.conversation_store import (
+    ConversationStore,
+    ConversationConflictError,
+    StaleConversationError,
+    encode_fields,
+    fields_size,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Words that cannot change a classification on their own. Negations are deliberately kept.
+_STOP_WORDS = frozenset("""
+a an the and or but so then that this these those there here when while time after before
+to of in on at from for with by as into onto up down out over
+is was were are be been being am has have had do did does
+it its she he her his him they them their we our us i me my you your who which what
+""".split())
+
+# Irregular past tenses a correction commonly introduces
+_IRREGULAR = {
+    "fell": "fall", "fallen": "fall", "broke": "break", "broken": "break", "ran": "run",
+    "got": "get", "went": "go", "gone": "go", "came": "come", "took": "take", "taken": "take",
+    "found": "find", "felt": "feel", "struck": "strike", "saw": "see", "seen": "see",
+    "gave": "give", "given": "give", "made": "make", "told": "tell", "said": "say",
+    "bit": "bite", "bitten": "bite", "threw": "throw", "thrown": "throw",
+}
+
+
+# Negations, with contractions written without their apostrophe as answers often are
+_NEGATIONS = frozenset("""
+no not never none nothing nobody without cannot cant dont doesnt didnt isnt arent wasnt werent
+hasnt havent hadnt wont wouldnt couldnt shouldnt
+""".split())
+
+
+def _negations(terms):
+    return sum(1 for word, _ in terms if word.replace("'", "") in _NEGATIONS)
+
+
+def _stem(word):
+    word = _IRREGULAR.get(word, word)
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _terms(text):
+    return [(word, _stem(word)) for word in re.findall(r"[a-z0-9]+(?:'[a-z]+)?", text.lower())]
+
+
+def _changed_materially(original, corrected, threshold):
+    """Return True when the correction changed what the answer says, not just its grammar.
+
+    Both texts are reduced to stemmed content words, with irregular past
+    tenses mapped to the present and stop words dropped (negations are
+    kept). Original words the correction respelled are matched to the
+    corrected word. The answer changed materially when a negation was
+    added or removed, or when the remaining word sequences are less
+    similar than threshold.
+    """
+    if not corrected:
+        return False
+    original_terms = _terms(original)
+    corrected_terms = _terms(corrected)
+    if _negations(original_terms) != _negations(corrected_terms):
+        return True
+    vocabulary = {stem: word for word, stem in corrected_terms}
+    original_words = []
+    for word, stem in original_terms:
+        if stem not in vocabulary:
+            # A misspelling the correction fixed counts as the corrected word
+            match = difflib.get_close_matches(stem, vocabulary, n=1, cutoff=0.75)
+            if match:
+                stem = match[0]
+                word = vocabulary[stem]
+        if word not in _STOP_WORDS:
+            original_words.append(stem)
+    corrected_words = [stem for word, stem in corrected_terms if word not in _STOP_WORDS]
+    if not original_words and not corrected_words:
+        return False
+    similarity = difflib.SequenceMatcher(None, original_words, corrected_words).ratio()
+    return similarity < threshold
+
+
+def _analysis_message(analysis_result):
+    return (
+        "\U0001F4CB **Event Classification**:\n\n"
+        + ("\U0001F6A8 Accident" if analysis_result["classification"] == "accident" else "⚡ Incident") + "\n\n"
+        + f"**Reasoning**: {analysis_result['classification_reason']}\n\n"
+        + "\U0001F3E5 **Injury Risk Analysis**:\n\n"
+        + ("⚠️ High chance of physical injury\n" if analysis_result["has_injury"] else "✓ No significant injury risk detected\n")
+        + f"**Risk Level**: {analysis_result['likelihood']}%\n\n"
+        + f"**Assessment**: {analysis_result['reasoning']}\n\n"
+    )
+
+
+def _snapshot(conversation):
+    """Copy the parts of a conversation a turn can change, for later diffing."""
+    return {**conversation, "responses": dict(conversation.get("responses", {}))}
+
+
+def _changes(snapshot, conversation):
+    """Return the fields, and the individual responses, changed since the snapshot."""
+    changes = {
+        key: value for key, value in conversation.items()
+        if key not in ("responses", "version") and snapshot.get(key) != value
+    }
+    responses = {
+        question: answer for question, answer in conversation.get("responses", {}).items()
+        if snapshot["responses"].get(question) != answer
+    }
+    if responses:
+        changes["responses"] = responses
+    return changes
+
 
 class ConversationManager:
     def __init__(self):
-        self.conversations = {}
+        # Local cache of recently used conversations; Redis holds the rest
+        self.conversations = ConversationCache(
+            max_entries=int(os.getenv('CONVERSATION_CACHE_SIZE', '1000')),
+            max_bytes=int(os.getenv('CONVERSATION_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+            idle_ttl=int(os.getenv('CONVERSATION_IDLE_TTL', '3600'))
+        )
+        self.warmup_limit = int(os.getenv('CONVERSATION_WARMUP_LIMIT', '0'))
+
+        # In shared mode every turn reads and writes through Redis so any worker can serve it
+        self.shared_state = os.getenv('CONVERSATION_STATE_MODE', 'local').lower() == 'shared'
+        self.max_save_attempts = int(os.getenv('CONVERSATION_SAVE_ATTEMPTS', '5'))
         self.groq_service = GroqService()
-        
-        # Initialize Redis connection
+        self.redis_client = None
+        self.store = None
+
+        # Run event analysis alongside grammar correction on the event details step
+        self.pipeline_event_analysis = os.getenv('EVENT_ANALYSIS_PIPELINE', 'true').lower() == 'true'
+        self.analysis_rerun_threshold = float(os.getenv('ANALYSIS_RERUN_THRESHOLD', '0.8'))
+
+        # Finished reports are archived to MongoDB in the background
+        self.archiver = ReportArchiver.from_env()
+
+    async def initialize(self):
+        """Connect to Redis and load cached conversations."""
+        if self.archiver:
+            self.archiver.start()
         redis_url = os.getenv('REDIS_URL')
         try:
-            self.redis_client = redis.from_url(
-                redis_url,
-                decode_responses=True
-            )
+            # Responses are left as bytes so conversations can use binary serializers
+            self.redis_client = redis.from_url(redis_url)
             # Test the connection
-            self.redis_client.ping()
-            print("Successfully connected to Redis")
-            self._load_conversations_from_cache()
+            await self.redis_client.ping()
+            logger.info("Successfully connected to Redis")
+            self.store = ConversationStore(self.redis_client)
+            self.groq_service.use_redis(self.redis_client)
+            await self._load_conversations_from_cache()
         except Exception as e:
-            print(f"Redis connection error: {e}")
-            print("Falling back to in-memory storage only")
+            logger.error("Redis connection error, falling back to in-memory storage only: %s", e)
             self.redis_client = None
+            self.store = None
+
+    async def close(self):
+        """Flush pending archives and release the Redis connection pool and the Groq client."""
+        if self.archiver:
+            await self.archiver.close()
+        if self.redis_client:
+            await self.redis_client.aclose()
+            self.redis_client = None
+            self.store = None
+        await self.groq_service.close()
+
+    async def _load_conversations_from_cache(self):
+        """Warm the local cache with up to CONVERSATION_WARMUP_LIMIT conversations.
 
-    def _load_conversations_from_cache(self):
-        """Load existing conversations from Redis cache."""
-        if not self.redis_client:
+        Conversations are otherwise loaded on demand by get_conversation. Keys
+        are walked with SCAN and fetched with one pipeline per batch so Redis
+        is never blocked the way KEYS would block it.
+        """
+        if not self.store or self.shared_state or self.warmup_limit <= 0:
             return
-            
+
         try:
-            cached_conversations = self.redis_client.keys('conversation:*')
-            for key in cached_conversations:
-                conv_id = key.split(':')[1]  # Removed decode('utf-8') since decode_responses=True
-                cached_data = self.redis_client.get(key)
-                if cached_data:
-                    self.conversations[conv_id] = json.loads(cached_data)
+            loaded = 0
+            batch = []
+            async for conversation_id in self.store.scan_ids():
+                batch.append(conversation_id)
+                if len(batch) >= 100 or loaded + len(batch) >= self.warmup_limit:
+                    loaded += await self._load_batch(batch)
+                    batch = []
+                    if loaded >= self.warmup_limit:
+                        break
+            if batch:
+                await self._load_batch(batch)
         except Exception as e:
-            print(f"Error loading from cache: {e}")
+            logger.error("Error loading from cache: %s", e)
+
+    async def _load_batch(self, conversation_ids):
+        for conversation_id, conversation, size in await self.store.load_many(conversation_ids):
+            await self._remember(conversation_id, conversation, size)
+        return len(conversation_ids)
 
-    def _cache_conversation(self, conversation_id):
-        """Cache conversation data in Redis."""
-        if not self.redis_client:
+    async def _remember(self, conversation_id, conversation, size):
+        """Add a conversation loaded from Redis to the local cache.
+
+        Conversations evicted to make room are written back to Redis if they
+        have unsaved changes. Without Redis evicted conversations are dropped.
+        """
+        evicted = self.conversations.put(conversation_id, conversation, size=size, dirty=False)
+        await self._write_back(evicted)
+
+    async def _write_back(self, evicted):
+        if not evicted or not self.store:
+            return
+        try:
+            await self.store.save_many(evicted)
+        except Exception as e:
+            logger.error("Error writing back evicted conversations: %s", e)
+
+    async def _cache_conversation(self, conversation_id, conversation, changes=None):
+        """Write the changed fields of a conversation (or all of it) to Redis."""
+        if not self.store:
+            self.conversations.mark_dirty(conversation_id, fields_size(encode_fields(conversation, changes)))
             return
             
         try:
-            conversation = self.get_conversation(conversation_id)
-            if conversation:
-                self.redis_client.set(
-                    f'conversation:{conversation_id}',
-                    json.dumps(conversation),
-                    ex=86400  # Cache for 24 hours
-                )
+            written = await self.store.save(conversation_id, conversation, changes)
+            self.conversations.mark_clean(conversation_id, written)
         except Exception as e:
-            print(f"Error caching conversation: {e}")
+            self.conversations.mark_dirty(conversation_id)
+            logger.error("Error caching conversation: %s", e)
 
-    def create_new_conversation(self):
-        """Create a new conversation and return its ID."""
+    async def create_new_conversation(self, resident_id=None, resident_name=None):
+        """Create a new conversation about the given resident and return its ID."""
         conversation_id = str(uuid.uuid4())
-        self.conversations[conversation_id] = {
+        current_conversation.set(conversation_id)
+        flow = FLOWS[DEFAULT_FLOW_ID]
+        conversation = {
             "responses": {},
             "analysis": None,
             "summary": None,
-            "injury_questions": False
+            "flow": flow.id,
+            "state": flow.start.id,
+            "resident_id": resident_id,
+            "resident_name": resident_name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "version": 0
         }
-        self._cache_conversation(conversation_id)
+        if self._is_shared():
+            await self.store.save(conversation_id, conversation)
+            return conversation_id
+        # The size is accounted for when the conversation is first saved
+        await self._write_back(self.conversations.put(conversation_id, conversation, size=0))
+        await self._cache_conversation(conversation_id, conversation)
         return conversation_id
 
-    def get_conversation(self, conversation_id):
-        """Retrieve an active conversation by its ID."""
-        return self.conversations.get(conversation_id)
+    def _is_shared(self):
+        return self.shared_state and self.store is not None
+
+    async def _save(self, conversation_id, conversation, snapshot):
+        """Persist only the fields and responses a turn changed, in one round trip.
+
+        In shared mode this raises StaleConversationError if another worker
+        saved the conversation since it was loaded.
+        """
+        changes = _changes(snapshot, conversation)
+        if not changes:
+            return
+        if self._is_shared():
+            await self.store.save_shared(conversation_id, conversation, changes)
+        else:
+            await self._cache_conversation(conversation_id, conversation, changes)
+        if changes.get("summary"):
+            self._archive(conversation_id, conversation)
+
+    async def _apply(self, conversation_id, conversation, apply):
+        """Run apply(conversation), which updates the conversation in place, and save the changes.
+
+        In shared mode, if another worker saved the conversation first, it is
+        reloaded and apply runs again on the fresh copy, so fields derived
+        from the whole conversation (state, analysis, summary) are never
+        computed from a stale one. Gives up with ConversationConflictError
+        after CONVERSATION_SAVE_ATTEMPTS tries.
+        """
+        for _ in range(self.max_save_attempts):
+            snapshot = _snapshot(conversation)
+            try:
+                result = await apply(conversation)
+            except BaseException:
+                # Undo partial changes (such as the answer recorded before a failed summary),
+                # so a retried turn is saved in full
+                conversation.clear()
+                conversation.update(snapshot)
+                raise
+            try:
+                await self._save(conversation_id, conversation, snapshot)
+                return result
+            except StaleConversationError:
+                conversation = await self.get_conversation(conversation_id)
+                if conversation is None:
+                    raise ValueError("Conversation not found.")
+        raise ConversationConflictError("Conversation was updated concurrently, please retry.")
+
+    def _archive(self, conversation_id, conversation):
+        """Queue a conversation for archival; returns immediately."""
+        if self.archiver:
+            status = "completed" if conversation.get("summary") else "stopped"
+            self.archiver.enqueue(report_document(conversation_id, conversation, status))
 
-    def start_conversation(self, conversation_id):
+    async def get_conversation(self, conversation_id):
+        """Retrieve an active conversation by its ID, loading it from Redis if needed.
+
+        In shared mode the conversation is always read from Redis and not cached
+        locally, since another worker may have changed it.
+        """
+        if not self._is_shared():
+            await self._write_back(self.conversations.collect_expired())
+            conversation = self.conversations.get(conversation_id)
+            if conversation is not None:
+                return conversation
+        if not self.store:
+            return None
+
+        try:
+            conversation, size = await self.store.load(conversation_id)
+        except Exception as e:
+            logger.error("Error loading from cache: %s", e)
+            return None
+        if conversation is None or self._is_shared():
+            return conversation
+        self.conversations.hydrations += 1
+        await self._remember(conversation_id, conversation, size)
+        return conversation
+
+    @staticmethod
+    def _flow(conversation):
+        return FLOWS[conversation.get("flow", DEFAULT_FLOW_ID)]
+
+    def _step(self, conversation, question):
+        """Return the step for the conversation's state, checking the question belongs to it.
+
+        Once the flow has finished, its last question may be answered again to
+        regenerate the summary. Conversations saved before states were tracked
+        are matched by question text alone.
+        """
+        flow = self._flow(conversation)
+        if "state" not in conversation:
+            return flow.step_for_question(question)
+        step = flow.step(conversation["state"])
+        if step is None:
+            step = flow.step_for_question(question)
+            if step is not None and step.next is None:
+                return step
+            raise UnexpectedQuestionError("The conversation is already complete.")
+        if step.question != question:
+            raise UnexpectedQuestionError(f"Expected an answer to: {step.question}")
+        return step
+
+    async def start_conversation(self, conversation_id):
         """Start a conversation and return the first question."""
-        conversation = self.get_conversation(conversation_id)
+        current_conversation.set(conversation_id)
+        conversation = await self.get_conversation(conversation_id)
         if not conversation:
             raise ValueError("Conversation not found.")
-        return "Please select the type of event from the options below."
+        return self._flow(conversation).start.question
+
+    async def _correct_and_analyse(self, response):
+        """Run grammar correction and event analysis on the raw response concurrently.
 
-    def handle_question(self, conversation_id, question, response):
+        The analysis is only repeated on the corrected text when the correction
+        changed the wording enough to possibly change the classification.
+        """
+        corrected_response, analysis_result = await asyncio.gather(
+            self.groq_service.check_grammar(response),
+            self.groq_service.event_analysis(response)
+        )
+        if _changed_materially(response, corrected_response, self.analysis_rerun_threshold):
+            analysis_result = await self.groq_service.event_analysis(corrected_response)
+        return corrected_response, analysis_result
+
+    async def handle_question(self, conversation_id, question, response):
         """Handle questions and responses during the conversation."""
-        conversation = self.get_conversation(conversation_id)
+        current_conversation.set(conversation_id)
+        conversation = await self.get_conversation(conversation_id)
         if not conversation:
             raise ValueError("Conversation not found.")
 
-        # Correct grammar using GroqService
-        corrected_response = self.groq_service.check_grammar(response)
+        started = time.perf_counter()
+        step = self._step(conversation, question)
+        corrected_response, analysis_result = await self._correct(step, response)
+        result = await self._apply(
+            conversation_id,
+            conversation,
+            # Checked again, as the state may have moved on while the answer was corrected
+            lambda conversation: self._record(
+                conversation, self._step(conversation, question), question, response, corrected_response, analysis_result
+            )
+        )
+        TURN_SECONDS.labels(current_step.get()).observe(time.perf_counter() - started)
+        return result
 
-        # Print debug messages
-        print(f"User Response Received: {response}")
-        print(f"Corrected Response: {corrected_response}")
+    async def handle_answers_batch(self, conversation_id, answers):
+        """Handle several (question, response) pairs submitted together.
 
-        # Save corrected response
-        conversation["responses"][question] = corrected_response
-        self._cache_conversation(conversation_id)
-
-        initial_questions = [
-            "Please select the type of event from the options below.",
-            "Please provide the name of the staff member who has any information regarding the event.",
-            "Where did the event take place?",
-            "When did the event happen?",
-            "Were there any witnesses?",
-            "Please provide details of the event.",
-        ]
-
-        if question in initial_questions:
-            current_index = initial_questions.index(question)
-            if current_index < len(initial_questions) - 1:
-                return {
-                    "next_question": initial_questions[current_index + 1],
-                    "analysis": None,
-                    "summary": None,
-                    "corrected_response": corrected_response
-                }
-
-            if question == "Please provide details of the event.":
-                analysis_result = self.groq_service.event_analysis(corrected_response)
-                conversation["analysis"] = analysis_result
-                conversation["scenario_type"] = analysis_result["classification"]
-                self._cache_conversation(conversation_id)
-
-                analysis_message = (
-                    "\U0001F4CB **Event Classification**:\n\n"
-                    + ("\U0001F6A8 Accident" if analysis_result["classification"] == "accident" else "⚡ Incident") + "\n\n"
-                    + f"**Reasoning**: {analysis_result['classification_reason']}\n\n"
-                    + "\U0001F3E5 **Injury Risk Analysis**:\n\n"
-                    + ("⚠️ High chance of physical injury\n" if analysis_result["has_injury"] else "✓ No significant injury risk detected\n")
-                    + f"**Risk Level**: {analysis_result['likelihood']}%\n\n"
-                    + f"**Assessment**: {analysis_result['reasoning']}\n\n"
-                )
+        Every answer is corrected (and the details answer analysed) concurrently,
+        then the answers are applied in order as if they had arrived one by one,
+        and the conversation is saved once. The summary, if the batch reaches
+        that step, is generated after the other answers are recorded.
+        """
+        current_conversation.set(conversation_id)
+        conversation = await self.get_conversation(conversation_id)
+        if not conversation:
+            raise ValueError("Conversation not found.")
+
+        started = time.perf_counter()
+        flow = self._flow(conversation)
+        # Fail before any LLM call if the batch does not start at the current step
+        self._step(conversation, answers[0][0])
+        steps = [flow.step_for_question(question) for question, _ in answers]
+        corrections = await asyncio.gather(
+            *(self._correct(step, response) for step, (_, response) in zip(steps, answers))
+        )
 
-                if analysis_result["has_injury"]:
-                    return {
-                        "next_question": "Did the patient sustain a physical injury as a result of the event?",
-                        "analysis": analysis_message,
-                        "summary": None,
-                        "corrected_response": corrected_response
-                    }
-                return {
-                    "next_question": "Please provide details of any immediate action taken.",
-                    "analysis": analysis_message,
-                    "summary": None,
-                    "corrected_response": corrected_response
-                }
-
-        if question == "Did the patient sustain a physical injury as a result of the event?":
-            if corrected_response.lower() == "yes":
-                conversation["injury_questions"] = True
-                self._cache_conversation(conversation_id)
-                return {
-                    "next_question": "Please specify the size of the injury.",
-                    "analysis": None,
-                    "summary": None,
-                    "corrected_response": corrected_response
-                }
-            return {
-                "next_question": "Please provide details of any immediate action taken.",
-                "analysis": None,
-                "summary": None,
-                "corrected_response": corrected_response
-            }
-
-        if conversation.get("injury_questions", False):
-            if question == "Please specify the size of the injury.":
-                return {
-                    "next_question": "Please specify the location of the injury.",
-                    "analysis": None,
-                    "summary": None,
-                    "corrected_response": corrected_response
-                }
-            if question == "Please specify the location of the injury.":
-                conversation["injury_questions"] = False
-                self._cache_conversation(conversation_id)
-                return {
-                    "next_question": "Please provide details of any immediate action taken.",
-                    "analysis": None,
-                    "summary": None,
-                    "corrected_response": corrected_response
-                }
-
-        remaining_questions = [
-            "Please provide details of any immediate action taken.",
-            "Would you like to add any vital observations?",
-            "Please describe any recovery action taken and by whom?",
-            "Please include a date and name of the person who was informed.",
-            "Thank you for filling out the form. Here is a summary of the event."
-        ]
-
-        if question in remaining_questions:
-            current_index = remaining_questions.index(question)
-            if current_index < len(remaining_questions) - 1:
-                return {
-                    "next_question": remaining_questions[current_index + 1],
-                    "analysis": None,
-                    "summary": None,
-                    "corrected_response": corrected_response
-                }
-            if question == "Thank you for filling out the form. Here is a summary of the event.":
-                summary = self.groq_service.summarize_scenario(
-                    responses=conversation["responses"],
-                    resident_name="Resident Name",
-                    scenario_type=conversation.get("scenario_type", "incident"),
-                    event_type="Event Type",
-                    staff="Staff Name"
+        async def record_all(conversation):
+            results = []
+            for step, (question, response), (corrected_response, analysis_result) in zip(steps, answers, corrections):
+                # Branches taken by earlier answers decide which question must come next
+                self._step(conversation, question)
+                current_step.set(step.id if step else "")
+                results.append(
+                    await self._record(conversation, step, question, response, corrected_response, analysis_result)
                 )
-                conversation["summary"] = summary
-                self._cache_conversation(conversation_id)
-                return {
-                    "next_question": None,
-                    "analysis": None,
-                    "summary": summary,
-                    "corrected_response": corrected_response
-                }
+            return results
+
+        results = await self._apply(conversation_id, conversation, record_all)
+        # One observation per batch, labelled with the step of its last answer
+        TURN_SECONDS.labels(current_step.get()).observe(time.perf_counter() - started)
 
         return {
+            "answers": [
+                {"question": question, "corrected_response": result["corrected_response"]}
+                for (question, _), result in zip(answers, results)
+            ],
+            "next_question": results[-1]["next_question"],
+            "analysis": next((r["analysis"] for r in reversed(results) if r["analysis"]), None),
+            "summary": next((r["summary"] for r in reversed(results) if r["summary"]), None),
+        }
+
+    async def _correct(self, step, response):
+        """Return the corrected response, plus the analysis when it was run alongside."""
+        # Stage metrics recorded from here on are labelled with this step
+        current_step.set(step.id if step else "")
+        if step is not None and step.action == "analysis" and self.pipeline_event_analysis:
+            return await self._correct_and_analyse(response)
+        # Correct grammar using GroqService
+        return await self.groq_service.check_grammar(response), None
+
+    async def _record(self, conversation, step, question, response, corrected_response, analysis_result):
+        action = step.action if step else None
+
+        log_payload(logger, "Response corrected", response=response, corrected_response=corrected_response)
+
+        # Save corrected response
+        conversation["responses"][question] = corrected_response
+
+        result = {
             "next_question": None,
             "analysis": None,
             "summary": None,
             "corrected_response": corrected_response
         }
+        if step is None:
+            return result
+
+        if action == "analysis":
+            if analysis_result is None:
+                analysis_result = await self.groq_service.event_analysis(corrected_response)
+            conversation["analysis"] = analysis_result
+            conversation["scenario_type"] = analysis_result["classification"]
+            result["analysis"] = _analysis_message(analysis_result)
+        elif action == "summary":
+            summary = await self.groq_service.summarize_scenario(**self._summary_kwargs(conversation))
+            conversation["summary"] = summary
+            result["summary"] = summary
+
+        next_step = self._flow(conversation).next_step(step, conversation, corrected_response)
+        conversation["state"] = next_step.id if next_step else None
+        result["next_question"] = next_step.question if next_step else None
+        return result
+
+    def _summary_kwargs(self, conversation):
+        return {
+            "responses": conversation["responses"],
+            "resident_name": conversation.get("resident_name") or "Resident Name",
+            "scenario_type": conversation.get("scenario_type", "incident"),
+            "event_type": "Event Type",
+            "staff": "Staff Name"
+        }
+
+    async def handle_question_stream(self, conversation_id, question, response):
+        """Like handle_question, but yields the summary in chunks as it is generated.
+
+        Yields {"summary_delta": ...} events while the summary streams, then the
+        same result dict handle_question returns. Questions other than the
+        summary step yield only the result.
+        """
+        current_conversation.set(conversation_id)
+        conversation = await self.get_conversation(conversation_id)
+        if not conversation:
+            raise ValueError("Conversation not found.")
+        step = self._step(conversation, question)
+        if step is None or step.action != "summary":
+            yield await self.handle_question(conversation_id, question, response)
+            return
+
+        started = time.perf_counter()
+        current_step.set(step.id)
+        corrected_response = await self.groq_service.check_grammar(response)
+
+        # Summarize a copy holding the answer, and save the answer only with the
+        # summary, so a failed stream leaves nothing from the turn behind
+        answered = {**conversation, "responses": {**conversation["responses"], question: corrected_response}}
+        parts = []
+        async for delta in self.groq_service.stream_summary(**self._summary_kwargs(answered)):
+            parts.append(delta)
+            yield {"summary_delta": delta}
+
+        summary = "".join(parts).strip()
+        snapshot = _snapshot(conversation)
+        conversation["responses"][question] = corrected_response
+        conversation["summary"] = summary
+        next_step = self._flow(conversation).next_step(step, conversation, corrected_response)
+        conversation["state"] = next_step.id if next_step else None
+        try:
+            # The streamed summary cannot be regenerated, so a concurrent save is a conflict, not a retry
+            await self._save(conversation_id, conversation, snapshot)
+        except BaseException:
+            conversation.clear()
+            conversation.update(snapshot)
+            raise
+        TURN_SECONDS.labels(step.id).observe(time.perf_counter() - started)
+        yield {
+            "next_question": next_step.question if next_step else None,
+            "analysis": None,
+            "summary": summary,
+            "corrected_response": corrected_response
+        }
 
-    def stop_conversation(self, conversation_id):
+    async def stop_conversation(self, conversation_id):
         """Stop a conversation and remove it from active memory and cache."""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
-            if self.redis_client:
+        current_conversation.set(conversation_id)
+        conversation = await self.get_conversation(conversation_id)
+        if conversation is not None:
+            if conversation["responses"] and not conversation.get("summary"):
+                # Completed reports were archived when their summary was saved
+                self._archive(conversation_id, conversation)
+            self.conversations.pop(conversation_id)
+            if self.store:
                 try:
-                    self.redis_client.delete(f'conversation:{conversation_id}')
+                    await self.store.delete(conversation_id)
                 except Exception as e:
-                    print(f"Error deleting from cache: {e}")
+                    logger.error("Error deleting from cache: %s", e)
         else:
             raise ValueError("Conversation not found.")
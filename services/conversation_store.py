@@ -0,0 +1,192 @@
+import json
+import os
+from redis.exceptions import ResponseError, WatchError
+from services.metrics import stage
+from services.serializers import VersionedSerializer
+
+RESPONSE_PREFIX = "responses:"
+
+default_serializer = VersionedSerializer(os.getenv("CONVERSATION_SERIALIZER", "json"))
+
+
+def encode_fields(conversation, changes=None, serializer=default_serializer):
+    """Map a conversation, or just the given changes to it, to Redis hash fields.
+
+    Each response gets its own "responses:<question>" field holding
+    [position, answer] so the question order survives the round trip.
+    Other top-level keys are stored one field each. The version field is
+    kept as a plain integer so it can be incremented with HINCRBY.
+    """
+    changes = conversation if changes is None else changes
+    fields = {}
+    positions = None
+    for key, value in changes.items():
+        if key == "responses":
+            if positions is None:
+                positions = {question: i for i, question in enumerate(conversation["responses"])}
+            for question, answer in value.items():
+                fields[RESPONSE_PREFIX + question] = serializer.dumps([positions[question], answer])
+        elif key == "version":
+            fields[key] = str(value).encode("utf-8")
+        else:
+            fields[key] = serializer.dumps(value)
+    return fields
+
+
+def decode_fields(fields, serializer=default_serializer):
+    conversation = {"responses": {}}
+    responses = []
+    for field, value in fields.items():
+        field = field.decode("utf-8") if isinstance(field, bytes) else field
+        if field == "version":
+            conversation[field] = int(value)
+        elif field.startswith(RESPONSE_PREFIX):
+            (position, answer), _ = serializer.loads(value)
+            responses.append((position, field[len(RESPONSE_PREFIX):], answer))
+        else:
+            conversation[field], _ = serializer.loads(value)
+    for _, question, answer in sorted(responses, key=lambda response: response[0]):
+        conversation["responses"][question] = answer
+    return conversation
+
+
+def fields_size(fields):
+    return sum(len(field) + len(value) for field, value in fields.items())
+
+
+class ConversationConflictError(Exception):
+    """Raised when a turn cannot be saved because of repeated concurrent updates."""
+
+
+class StaleConversationError(ConversationConflictError):
+    """Raised by save_shared when the conversation was saved by someone else since it was loaded."""
+
+
+class ConversationStore:
+    """Persists conversations in Redis as one hash per conversation.
+
+    Turns only write the fields they changed, together with the TTL refresh,
+    in a single pipeline round trip. Field values go through the configured
+    serializer, so the client must not decode responses.
+    """
+
+    def __init__(self, redis_client, ttl=86400, serializer=default_serializer):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.serializer = serializer
+
+    @staticmethod
+    def key(conversation_id):
+        return f'conversation:{conversation_id}'
+
+    async def load(self, conversation_id):
+        """Return (conversation, approximate size), or (None, 0) if it does not exist."""
+        key = self.key(conversation_id)
+        try:
+            with stage("redis_load"):
+                fields = await self.redis_client.hgetall(key)
+        except ResponseError:
+            return await self._migrate_legacy(key)
+        if not fields:
+            return None, 0
+        with stage("deserialize"):
+            conversation = decode_fields(fields, self.serializer)
+        return conversation, fields_size(fields)
+
+    async def load_many(self, conversation_ids):
+        """Load several conversations in one pipeline; missing ones are skipped."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for conversation_id in conversation_ids:
+                pipe.hgetall(self.key(conversation_id))
+            results = await pipe.execute(raise_on_error=False)
+        loaded = []
+        for conversation_id, fields in zip(conversation_ids, results):
+            if isinstance(fields, ResponseError):
+                conversation, size = await self._migrate_legacy(self.key(conversation_id))
+                if conversation is not None:
+                    loaded.append((conversation_id, conversation, size))
+            elif fields:
+                loaded.append((conversation_id, decode_fields(fields, self.serializer), fields_size(fields)))
+        return loaded
+
+    async def _migrate_legacy(self, key):
+        """Rewrite a conversation stored as a single JSON string as a hash."""
+        cached_data = await self.redis_client.get(key)
+        if not cached_data:
+            return None, 0
+        conversation = json.loads(cached_data)
+        conversation.setdefault("responses", {})
+        fields = encode_fields(conversation, serializer=self.serializer)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        return conversation, fields_size(fields)
+
+    async def save(self, conversation_id, conversation, changes=None):
+        """Write the changed fields (or the whole conversation) and refresh the TTL.
+
+        Returns the number of bytes written.
+        """
+        with stage("serialize"):
+            fields = encode_fields(conversation, changes, self.serializer)
+        if not fields:
+            return 0
+        key = self.key(conversation_id)
+        with stage("redis_save"):
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        return fields_size(fields)
+
+    async def save_many(self, conversations):
+        """Write several whole conversations in one pipeline."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for conversation_id, conversation in conversations:
+                key = self.key(conversation_id)
+                pipe.hset(key, mapping=encode_fields(conversation, serializer=self.serializer))
+                pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def save_shared(self, conversation_id, conversation, changes):
+        """Write a turn's changes if nobody has saved the conversation since it was loaded.
+
+        The stored version field is compared with conversation["version"]
+        under WATCH, and incremented in the same MULTI as the changes. If
+        another worker saved first, StaleConversationError is raised and
+        nothing is written; the caller reloads the conversation and applies
+        the turn again. A conversation stopped in the meantime is not
+        recreated.
+        """
+        with stage("serialize"):
+            fields = encode_fields(conversation, changes, self.serializer)
+        if not fields:
+            return 0
+        key = self.key(conversation_id)
+        with stage("redis_save"):
+            try:
+                async with self.redis_client.pipeline(transaction=True) as pipe:
+                    await pipe.watch(key)
+                    if not await pipe.exists(key):
+                        raise ValueError("Conversation not found.")
+                    stored_version = int(await pipe.hget(key, "version") or 0)
+                    if stored_version != conversation.get("version", 0):
+                        raise StaleConversationError("Conversation was updated concurrently, please retry.")
+                    pipe.multi()
+                    pipe.hset(key, mapping=fields)
+                    pipe.hincrby(key, "version", 1)
+                    pipe.expire(key, self.ttl)
+                    _, version, _ = await pipe.execute()
+            except WatchError:
+                raise StaleConversationError("Conversation was updated concurrently, please retry.")
+        conversation["version"] = version
+        return fields_size(fields)
+
+    async def delete(self, conversation_id):
+        await self.redis_client.delete(self.key(conversation_id))
+
+    async def scan_ids(self, count=500):
+        async for key in self.redis_client.scan_iter(match='conversation:*', count=count):
+            yield key.decode("utf-8").split(':', 1)[1]
@@ -0,0 +1,93 @@
+import re
+
+# Event type options offered by the form; the grammar prompt returns these as-is.
+EVENT_TYPES = {
+    "fall",
+    "missing person",
+    "self harm",
+    "physical assault",
+    "medication",
+    "environmental",
+    "near miss",
+    "absconding",
+    "skin integrity",
+    "behaviour",
+    "ipc related",
+}
+
+YES_NO = {
+    "yes": "yes",
+    "y": "yes",
+    "yeah": "yes",
+    "yep": "yes",
+    "yup": "yes",
+    "no": "no",
+    "n": "no",
+    "nope": "no",
+    "nah": "no",
+}
+
+# Words that make a short answer a sentence which needs tense conversion.
+SENTENCE_MARKERS = {
+    "i", "he", "she", "they", "we", "it", "you",
+    "is", "are", "am", "was", "were", "has", "have", "had",
+    "do", "does", "did", "will", "can",
+}
+
+# 4-digit 24-hour times written without a colon, e.g. "at 1821" or "1500 hours".
+TIME_PATTERN = re.compile(
+    r"\b(?P<at>at\s+)?(?P<hh>[01]\d|2[0-3])(?P<mm>[0-5]\d)\b(?P<suffix>\s*(?:hours|hrs|h)\b)?",
+    re.IGNORECASE
+)
+
+
+def normalise_times(text: str) -> str:
+    """Rewrite "1821 hours" / "at 1500" as "18:21 hours" / "at 15:00"."""
+    def replace(match):
+        if not match.group("at") and not match.group("suffix"):
+            return match.group(0)
+        return f"{match.group('at') or ''}{match.group('hh')}:{match.group('mm')}{match.group('suffix') or ''}"
+
+    return TIME_PATTERN.sub(replace, text)
+
+
+class GrammarFastPath:
+    """Answers grammar correction locally for categorical and short responses."""
+
+    def __init__(self, max_words: int = 3):
+        self.max_words = max_words
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def correct(self, user_response: str):
+        """Return the corrected response, or None if it needs the LLM."""
+        result = self._classify(user_response.strip())
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _classify(self, text: str):
+        lowered = text.lower().rstrip(".!")
+        if lowered in YES_NO:
+            return YES_NO[lowered]
+        if lowered in EVENT_TYPES:
+            return text.rstrip(".!")
+        if lowered.startswith("was ") and lowered[4:] in EVENT_TYPES:
+            return text[4:].rstrip(".!")
+
+        words = re.findall(r"[a-z']+", lowered)
+        if len(text.split()) > self.max_words:
+            return None
+        if any(word in SENTENCE_MARKERS for word in words):
+            return None
+        return normalise_times(text)
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import random
+import time
+
+import httpx
+from groq import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncGroq,
+    InternalServerError,
+    RateLimitError,
+)
+
+OUTCOMES = ("success", "retry", "timeout", "rate_limited", "server_error", "error", "circuit_open")
+
+
+class GroqUnavailableError(Exception):
+    """Raised when Groq cannot serve a request after retries, or the circuit is open."""
+
+
+class CircuitOpenError(GroqUnavailableError):
+    pass
+
+
+class GroqRequestError(Exception):
+    """Raised when a completion fails in a way retrying will not fix, such as a rejected request."""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and fails fast until the cooldown passes.
+
+    Once the cooldown has passed a single trial request is let through; its
+    success closes the circuit again and its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another request be the trial when this one ended without a verdict."""
+        self._trial_in_flight = False
+
+
+class ResilientGroqClient:
+    """Groq chat completions with timeouts, retries and a circuit breaker.
+
+    All requests share one pooled HTTP client. Rate limits (429), server
+    errors (5xx), timeouts and connection errors are retried with jittered
+    exponential backoff, waiting at least as long as a retry-after header
+    asks; a retry-after longer than the method's timeout is not waited out
+    but raised as GroqUnavailableError. Only server errors, timeouts and
+    connection errors count towards opening the circuit: a 429 means the
+    quota is spent for now, not that Groq is down. Other errors are raised
+    immediately and leave the circuit as it was. Each attempt's outcome is
+    counted per method.
+    """
+
+    def __init__(self, client=None, timeouts=None, default_timeout=30.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, breaker=None):
+        if client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", "100")),
+                    max_keepalive_connections=int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "20")),
+                ),
+                timeout=default_timeout,
+            )
+            client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client, max_retries=0)
+        self.client = client
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            timeouts={
+                "check_grammar": float(os.getenv("GROQ_TIMEOUT_CHECK_GRAMMAR", "10")),
+                "event_analysis": float(os.getenv("GROQ_TIMEOUT_EVENT_ANALYSIS", "20")),
+                "summarize_scenario": float(os.getenv("GROQ_TIMEOUT_SUMMARIZE_SCENARIO", "60")),
+            },
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("GROQ_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("GROQ_BACKOFF_MAX", "8")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("GROQ_CIRCUIT_FAILURES", "5")),
+                cooldown=float(os.getenv("GROQ_CIRCUIT_COOLDOWN", "30")),
+            ),
+        )
+
+    def _record(self, method, outcome):
+        counters = self.metrics.setdefault(method, dict.fromkeys(OUTCOMES, 0))
+        counters[outcome] += 1
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "methods": {method: dict(counters) for method, counters in self.metrics.items()},
+        }
+
+    async def create(self, method, backoff=None, **request):
+        """Run chat.completions.create for the given GroqService method name.
+
+        backoff, if given, is awaited with the delay between attempts instead
+        of asyncio.sleep, so a caller can give back resources while it waits.
+        """
+        timeout = self.timeouts.get(method, self.default_timeout)
+        attempt = 0
+        while True:
+            trial = self.breaker.state == "half_open"
+            if not self.breaker.allow():
+                self._record(method, "circuit_open")
+                raise CircuitOpenError("Groq circuit breaker is open.")
+            try:
+                try:
+                    response = await self.client.chat.completions.create(timeout=timeout, **request)
+                finally:
+                    # A cancelled trial (client disconnect, shutdown) must not hold the circuit half open;
+                    # an outcome recorded below settles the breaker either way
+                    if trial:
+                        self.breaker.release_trial()
+            except (RateLimitError, InternalServerError, APITimeoutError, APIConnectionError) as e:
+                if not isinstance(e, RateLimitError):
+                    self.breaker.record_failure()
+                self._record(method, self._outcome(e))
+                if attempt >= self.max_retries:
+                    raise GroqUnavailableError(f"Groq request failed after {attempt + 1} attempts: {e}") from e
+                delay = self._backoff(attempt, e)
+                if delay > timeout:
+                    # Retrying any sooner would only hit the limit again
+                    raise GroqUnavailableError(f"Groq asked to retry after {delay:.0f}s: {e}") from e
+                self._record(method, "retry")
+                await (backoff or asyncio.sleep)(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Client errors (bad request, auth) are not retried and say nothing about Groq's health
+                self._record(method, "error")
+                raise
+            self.breaker.record_success()
+            self._record(method, "success")
+            return response
+
+    @staticmethod
+    def _outcome(error):
+        if isinstance(error, RateLimitError):
+            return "rate_limited"
+        if isinstance(error, APITimeoutError):
+            return "timeout"
+        if isinstance(error, APIStatusError):
+            return "server_error"
+        return "error"
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                delay = max(delay, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+        return delay
+
+    async def close(self):
+        await self.client.close()
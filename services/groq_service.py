@@ -1,11 +1,166 @@
-from groq import Groq
+import logging
 import os
 import time
+from models.event_analysis import EventAnalysis
+from services.grammar_fastpath import GrammarFastPath
+from services.groq_client import ResilientGroqClient, GroqRequestError, GroqUnavailableError
+from services.llm_cache import LLMCache
+from services.llm_scheduler import LLMScheduler, estimate_tokens
+from services.metrics import observe_stage, record_usage, stage
+from services.prompts import get_prompt
+
+logger = logging.getLogger(__name__)
+
 class GroqService:
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        # Timeouts, retries and the circuit breaker live in the client wrapper
+        self.client = ResilientGroqClient.from_env()
+
+        # Prompts are built once at import; the grammar step can use the lean variant
+        self.prompts = {
+            "check_grammar": get_prompt("check_grammar", os.getenv("GRAMMAR_PROMPT_VARIANT", "full")),
+            "event_analysis": get_prompt("event_analysis"),
+            "summarize_scenario": get_prompt("summarize_scenario"),
+        }
+
+        # Short and categorical answers are corrected locally without an LLM call
+        self.grammar_fastpath = None
+        if os.getenv("GRAMMAR_FASTPATH", "true").lower() == "true":
+            self.grammar_fastpath = GrammarFastPath(
+                max_words=int(os.getenv("GRAMMAR_FASTPATH_MAX_WORDS", "3"))
+            )
+
+        # Identical requests are answered from the response cache
+        self.cache = None
+        if os.getenv("LLM_CACHE", "true").lower() == "true":
+            self.cache = LLMCache(
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+                ttls={
+                    "check_grammar": int(os.getenv("LLM_CACHE_TTL_CHECK_GRAMMAR", "86400")),
+                    "event_analysis": int(os.getenv("LLM_CACHE_TTL_EVENT_ANALYSIS", "86400")),
+                    "summarize_scenario": int(os.getenv("LLM_CACHE_TTL_SUMMARIZE_SCENARIO", "3600")),
+                }
+            )
+
+        # JSON-mode analysis only needs room for the seven schema fields
+        self.event_analysis_max_tokens = int(os.getenv("EVENT_ANALYSIS_MAX_TOKENS", "300"))
+
+        # Every completion waits for a concurrency slot and token budget
+        self.scheduler = LLMScheduler(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+            tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+            max_wait=float(os.getenv("LLM_MAX_QUEUE_WAIT", "30"))
+        )
+
+    def use_redis(self, redis_client):
+        """Share the response cache and the token budget across workers through Redis."""
+        if self.cache and os.getenv("LLM_CACHE_REDIS", "true").lower() == "true":
+            self.cache.use_redis(redis_client)
+        if os.getenv("LLM_RATE_LIMIT_REDIS", "false").lower() == "true":
+            self.scheduler.use_redis(redis_client)
+
+    async def _complete(self, method: str, messages: list, model: str, temperature: float, validate=None, **options):
+        """Run a chat completion, answering from the response cache when possible.
+
+        Extra options such as response_format and max_tokens are passed to
+        the API and are part of the cache key. If validate is given, the
+        reply is returned as validate(content), and a reply it rejects by
+        raising is not cached.
+        """
+        with stage(method, model):
+            key = None
+            if self.cache:
+                key = LLMCache.make_key(model=model, temperature=temperature, messages=messages, **options)
+                cached = await self.cache.get(method, key)
+                if cached is not None:
+                    return validate(cached) if validate else cached
+
+            estimated = estimate_tokens(method, messages, options.get("max_tokens"))
+            async with self.scheduler.slot(method, estimated) as slot:
+                response = await self.client.create(
+                    method,
+                    backoff=slot.sleep_outside,
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    **options
+                )
+                usage = getattr(response, "usage", None)
+                if usage:
+                    slot.record_usage(usage.total_tokens)
+                    record_usage(method, model, usage)
+            content = response.choices[0].message.content.strip()
+            result = validate(content) if validate else content
+
+            if self.cache:
+                await self.cache.set(method, key, content)
+            return result
+
+    async def _stream(self, method: str, messages: list, model: str, temperature: float):
+        """Stream a chat completion chunk by chunk and cache the full text once it completes."""
+        started = time.perf_counter()
+        key = None
+        if self.cache:
+            key = LLMCache.make_key(model=model, temperature=temperature, messages=messages)
+            cached = await self.cache.get(method, key)
+            if cached is not None:
+                observe_stage(method, started, model)
+                yield cached
+                return
+
+        parts = []
+        async with self.scheduler.slot(method, estimate_tokens(method, messages)) as slot:
+            stream = await self.client.create(
+                method,
+                backoff=slot.sleep_outside,
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+                # Groq reports usage on the final chunk, under x_groq on older API versions
+                usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage:
+                    record_usage(method, model, usage)
+        observe_stage(method, started, model)
+
+        if self.cache:
+            await self.cache.set(method, key, "".join(parts).strip())
+
+    async def close(self):
+        await self.scheduler.close()
+        await self.client.close()
  
-    def summarize_scenario(
+    def _summary_messages(
+        self,
+        responses,
+        resident_name: str,
+        scenario_type: str,
+        event_type: str,
+        staff: str
+    ) -> list:
+        combined_description = f"This is a report about a {scenario_type}.\n"
+        if type(responses)== dict:
+            for i, (question, answer) in enumerate(responses.items(), start=1):
+                combined_description += f"{i}. {question}: {answer}\n"
+        else:
+            combined_description = combined_description + responses
+
+        return self.prompts["summarize_scenario"].messages(
+            scenario_type=scenario_type,
+            event_type=event_type,
+            resident_name=resident_name,
+            staff=staff,
+            description=combined_description
+        )
+
+    async def summarize_scenario(
         self, 
         responses,
         resident_name: str, 
@@ -14,125 +169,79 @@ class GroqService:
         staff: str
     ) -> str:
         try:
-            combined_description = f"This is a report about a {scenario_type}.\n"
-            if type(responses)== dict:
-                for i, (question, answer) in enumerate(responses.items(), start=1):
-                    combined_description += f"{i}. {question}: {answer}\n"
-            else:
-                combined_description = combined_description + responses
-
             # Generate the summary response
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert in writing accurate and professional incident reports for care homes."
-                            "Your task is to generate a report based on the context provided by the user in a question-and-answer format. "
-                            f"Analyze the user's responses to identify specific action-related keywords or phrases that describe the nature of the {scenario_type}, including the part of the body involved in any injury. "
-                            "Focus on extracting these keywords directly from the user's narrative without inferring, assuming, or adding any information that was not explicitly mentioned by the user.\n"
-                            "The report must be descriptive and structured as follows:\n"
-                            f"1. **Title of the {scenario_type}**: {event_type}  - Provide a clear, concise title using the exact words provided by the user. Include the part of the body involved if mentioned. Do not add any inferred terms.\n"
-                            f"2. **Descriptive Summary**: Craft a detailed paragraph explaining the incident in a narrative form using only the user's words. Ensure the description is context-specific, including the time, location, and all individuals involved (e.g., resident:{resident_name}, Staff: {staff}, and any other people mentioned in the responses), actions taken, medical terms, and the part of the body involved in any injury if explicitly stated. **Do not infer any injuries, actions, or other details not explicitly stated by the user**.\n"
-                            f"3. **Key Findings**: Summarize the main facts using only the user's responses. Extract key elements such as location, actions, individuals involved (resident:{resident_name}, staff:{staff}, and others), medical observations, and the part of the body injured. **Do not add or infer any details**. Bold important facts and findings.\n"
-                            "4. **Action Taken**: Describe any actions taken based on the user's input. Highlight any immediate responses or follow-up actions, using only the actions described by the user. **Do not add any details that were not provided**.\n"
-                            "5. **Don't censor sensitive or violent words**.\n"
-                            "6. **Maintain Clarity**: Use professional language that directly reflects the event's seriousness or nature, ensuring that the title and report reflect the user's exact input without inferring any additional information.\n"
-                            "Ensure that no information is inferred or added that is not explicitly stated in the user's input. All findings, actions, and recommendations should be based strictly on the provided context, and any relevant words should be bolded for emphasis."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": (
-                            f"Please provide a descriptive summary of the following {scenario_type} involving {event_type} for resident: {resident_name}"
-                            f"from the provided context:\n{combined_description}"
-                        )
-                        
-                    }
-                ],
-                model="llama-3.3-70b-versatile",
-                temperature=0.2
+            return await self._complete(
+                "summarize_scenario",
+                messages=self._summary_messages(responses, resident_name, scenario_type, event_type, staff),
+                model=self.prompts["summarize_scenario"].model,
+                temperature=self.prompts["summarize_scenario"].temperature
             )
 
-            return response.choices[0].message.content.strip()
+        except GroqUnavailableError:
+            raise
+        except Exception as e:
+            # Raise rather than return a placeholder, so no report is saved with it as the summary
+            logger.error("Error summarizing scenario: %s", e)
+            raise GroqRequestError("The summary could not be generated.") from e
+
+    async def stream_summary(
+        self,
+        responses,
+        resident_name: str,
+        scenario_type: str,
+        event_type: str,
+        staff: str
+    ):
+        """Yield the scenario summary in chunks as Groq streams its tokens."""
+        try:
+            async for delta in self._stream(
+                "summarize_scenario",
+                messages=self._summary_messages(responses, resident_name, scenario_type, event_type, staff),
+                model=self.prompts["summarize_scenario"].model,
+                temperature=self.prompts["summarize_scenario"].temperature
+            ):
+                yield delta
 
+        except GroqUnavailableError:
+            raise
         except Exception as e:
-            print(f"Error summarizing scenario: {e}")
-            return "An error occurred during scenario summarization."
+            logger.error("Error streaming scenario summary: %s", e)
+            raise GroqRequestError("The summary could not be generated.") from e
 
  
  
        
-    def check_grammar(self, user_response: str) -> str:
+    async def check_grammar(self, user_response: str) -> str:
         try:
             if not user_response.strip():
                 return ""
+
+            if self.grammar_fastpath:
+                fast_response = self.grammar_fastpath.correct(user_response)
+                if fast_response is not None:
+                    return fast_response
    
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert language model that checks, corrects grammatical errors, identifies names (like resident/patient/victim names, staff names, places) correctly "
-                            "extracts time-related data (like time of events, dates, days), and converts sentences to past tense. You professionally handle all types of accident or incident reports, including those involving extreme violence or emergencies. "
-                            "Follow these steps:\n\n"
-                            "1. **Analyze the Sentence**: Carefully read the user response and identify any grammatical errors\n"
-                            "2. **Correct Errors**: Fix any grammatical issues such as verb agreement, spelling, or punctuation.\n"
-                            "3. **Preserve Meaning**: Ensure the original meaning of the sentence is maintained.\n"
-                            "4. **Convert to Past Tense**: Always convert the sentence to past tense, even if it's already grammatically correct.\n"
-                            "5. **Generate the Response**: Output the corrected and past-tense version of the sentence without any additional notes, explanations, or information\n"
-                            "6. **Yes/No Responses**: For yes/no type questions, such as 'Were there any witnesses?', return only 'yes' or 'no' without adding any extra words.\n"
-                            "7. **Respect Time Formats**: Maintain the original time format (12-hour or 24-hour) without altering it.\n"
-                            "8. **Don't censor sensitive or violent words**.\n\n"
-                            "**Important Notes:**\n"
-                            "- Do not provide explanations or additional comments; just provide the correct sentences.\n"
-                            "- Always convert to past tense, unless dealing with dates, times, or days.\n"
-                            "- For single-word responses or short phrases, return them as-is.\n"
-                            "Examples:\n"
-                            "Input: The patient is experiencing chest pain.\nOutput: The patient was experiencing chest pain.\n"
-                            "Input: We administer medication to the patient.\nOutput: We administered medication to the patient.\n"
-                            "Input: The incident occurs at 3:00 PM.\nOutput: The incident occurred at 3:00 PM.\n"
-                            "Input: IPC related\nOutput: IPC related\n"
-                            "Input: It is inside the care home on 5th of September 2024 at 1821 hours.\n Output:It is inside the care home on 5th of September 2024 at 18:21 hours\n"
-                            "Input: In the patient's room, at 1500, on October 2, 2024.\n Output:In the patient's room, at 15:00, on October 2, 2024.\n"
-                            "Input: In the patient's room, on October 2, 2024 at 16134, on October 2, 2024.\n Output:In the patient's room, on October 2, 2024 at 16:34\n"
-                            "Input: In the patient's room, on October 2, 2024 at 16134 .\n Output:In the patient's room, on October 2, 2024 at 16:34\n"
-                            "Input: missing person\nOutput: missing person\n"
-                            "Input: self harm\nOutput: self harm\n"
-                            "Input: physical assault\nOutput: physical assault\n"
-                            "Input: medication\nOutput: medication\n"
-                            "Input: environmental\nOutput: environmental\n"
-                            "Input: near miss\nOutput: near miss\n"
-                            "Input: absconding\nOutput: absconding\n"
-                            "Input: skin integrity\nOutput: skin integrity\n"
-                            "Input: was skin integrity\nOutput: skin integrity\n"
-                            "Input: fall\nOutput: fall\n"
-                            "Input: behaviour\nOutput: behaviour\n"
-                        )
-                    },
-                   {
-                        "role": "user",
-                        "content": user_response.strip()
-                    }
-                ],  
-                model="llama-3.3-70b-versatile",
-                temperature=0.5
+            prompt = self.prompts["check_grammar"]
+            corrected_text = await self._complete(
+                "check_grammar",
+                messages=prompt.messages(text=user_response.strip()),
+                model=prompt.model,
+                temperature=prompt.temperature
             )
    
-            corrected_text= response.choices[0].message.content.strip()
             if corrected_text == user_response.strip():
                 return user_response.strip()
             
             return corrected_text
  
         except Exception as e:
-            # Handle exceptions appropriately
-            print(f"An error occurred: {e}")
-            return ""
+            # Keep the answer uncorrected rather than losing it
+            logger.error("Error checking grammar: %s", e)
+            return user_response.strip()
         
         
         
-    def event_analysis(self, event_details: str) -> dict:
+    async def event_analysis(self, event_details: str) -> dict:
         """
         Analyzes the event details to determine injury risk, classification, and whether injury is mentioned.
         
@@ -149,74 +258,22 @@ class GroqService:
                 - classification_reason (str): Explanation for classification
         """
         try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an expert in healthcare and injury risk assessment. Analyze the event "
-                            "description for three aspects:\n\n"
-                            "1. Injury Risk Assessment: Determine if there's any possibility of physical injury\n"
-                            "2. Injury Mention Detection: Check if injury is explicitly or implicitly mentioned\n"
-                            "   - Explicit mentions: bruise, cut, wound, injury, pain, etc.\n"
-                            "   - Implicit mentions: bleeding, swelling, redness, limping, unable to move, etc.\n"
-                            "   - Physical symptoms: marks, discoloration, difficulty moving, etc.\n"
-                            "3. Event Classification: Determine if this is an incident or accident\n\n"
-                            "Format your response EXACTLY as follows:\n"
-                            "Has Injury Risk: [true/false]\n"
-                            "Risk Percentage: [0-100]\n"
-                            "Risk Reasoning: [brief explanation]\n"
-                            "Injury Mentioned: [true/false]\n"
-                            "Mention Details: [what injury-related terms were found, or 'None found']\n"
-                            "Classification: [INCIDENT/ACCIDENT]\n"
-                            "   - If there is any injury/physical injury classified as accident"
-                            "   - If there any no injury classified as incident"
-                            "Classification Reason: [brief explanation why it is incident/accident]\n\n"
-                            "Examples:\n"
-                            "'Resident fell and has a bruise' -> Injury Mentioned: true (explicit mention of bruise)\n"
-                            "'Resident's arm is red and swollen' -> Injury Mentioned: true (implicit - symptoms described)\n"
-                            "'Resident nearly fell but was caught' -> Injury Mentioned: false (no injury described)\n"
-                            "'Resident seems uncomfortable moving' -> Injury Mentioned: true (implicit - physical symptom)\n"
-                            "'Resident refused medication' -> Injury Mentioned: false (no physical symptoms described)"
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Please analyze this event description: {event_details}"
-                    }
-                ],
-                model="llama-3.3-70b-versatile",
-                temperature=0.1
+            prompt = self.prompts["event_analysis"]
+            analysis = await self._complete(
+                "event_analysis",
+                messages=prompt.messages(event_details=event_details),
+                model=prompt.model,
+                temperature=prompt.temperature,
+                response_format={"type": "json_object"},
+                max_tokens=self.event_analysis_max_tokens,
+                validate=lambda text: EventAnalysis.model_validate_json(text).to_result()
             )
+            return analysis
 
-            analysis_text = response.choices[0].message.content.strip()
-            
-            # Parse the response
-            lines = analysis_text.split('\n')
-            analysis_dict = {}
-            for line in lines:
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    analysis_dict[key.strip()] = value.strip()
-
-            return {
-                "has_injury": 'true' in analysis_dict.get('Has Injury Risk', '').lower(),
-                "likelihood": float(analysis_dict.get('Risk Percentage', '0').strip().rstrip('%')),
-                "reasoning": analysis_dict.get('Risk Reasoning', ''),
-                "injury_mentioned": 'true' in analysis_dict.get('Injury Mentioned', '').lower(),
-                "mention_details": analysis_dict.get('Mention Details', 'None found'),
-                "classification": analysis_dict.get('Classification', 'INCIDENT').lower(),
-                "classification_reason": analysis_dict.get('Classification Reason', '')
-            }
-
+        except GroqUnavailableError:
+            raise
         except Exception as e:
-            print(f"Error in event analysis: {e}")
-            return {
-                "has_injury": True,  # Default to True for safety
-                "likelihood": 50.0,
-                "reasoning": "Error in analysis - defaulting to cautionary assessment",
-                "injury_mentioned": False,
-                "mention_details": "Error in analysis",
-                "classification": "accident",  # Default to accident for safety
-                "classification_reason": "Error in analysis - defaulting to accident classification"
-            }
\ No newline at end of file
+            # Raise rather than return a made-up analysis, which would be saved,
+            # steer the flow and be archived as if the event had been classified
+            logger.error("Error in event analysis: %s", e)
+            raise GroqRequestError("The event could not be analysed.") from e
\ No newline at end of file
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """Content-addressed cache for chat completions.
+
+    Entries are keyed by a hash of the full request (model, temperature and
+    messages). The in-process tier is an LRU bounded by entry count and total
+    bytes; the optional Redis tier is shared by every worker.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=8 * 1024 * 1024, ttls=None, default_ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.redis_client = None
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._bytes = 0
+        self.metrics = {}
+
+    def use_redis(self, redis_client):
+        """Enable the shared Redis tier using an existing async client."""
+        self.redis_client = redis_client
+
+    @staticmethod
+    def make_key(**request) -> str:
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _record(self, method, outcome):
+        counters = self.metrics.setdefault(method, {"hits": 0, "redis_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "methods": {method: dict(counters) for method, counters in self.metrics.items()},
+        }
+
+    async def get(self, method, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._record(method, "hits")
+                return value
+            self._remove(key)
+
+        if self.redis_client:
+            try:
+                value = await self.redis_client.get(f"llm-cache:{key}")
+            except Exception as e:
+                logger.error("Error reading LLM cache: %s", e)
+                value = None
+            if value is not None:
+                value = value.decode("utf-8")
+                self._store(method, key, value)
+                self._record(method, "redis_hits")
+                return value
+
+        self._record(method, "misses")
+        return None
+
+    async def set(self, method, key, value):
+        ttl = self.ttls.get(method, self.default_ttl)
+        if ttl <= 0:
+            return
+        self._store(method, key, value)
+        if self.redis_client:
+            try:
+                await self.redis_client.set(f"llm-cache:{key}", value, ex=ttl)
+            except Exception as e:
+                logger.error("Error writing LLM cache: %s", e)
+
+    def _store(self, method, key, value):
+        ttl = self.ttls.get(method, self.default_ttl)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from services.groq_client import GroqUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are served first: interactive grammar checks before reports.
+PRIORITIES = {"check_grammar": 0, "event_analysis": 1, "summarize_scenario": 2}
+
+# Rough completion sizes used to reserve tokens before the real usage is known.
+OUTPUT_TOKEN_ESTIMATES = {"check_grammar": 100, "event_analysis": 200, "summarize_scenario": 800}
+
+
+def estimate_tokens(method, messages, max_tokens=None):
+    prompt_chars = sum(len(message["content"]) for message in messages)
+    return prompt_chars // 4 + (max_tokens or OUTPUT_TOKEN_ESTIMATES.get(method, 200))
+
+
+class TokenBucket:
+    """Tokens-per-minute bucket local to this process."""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+
+    async def take(self, tokens):
+        """Take tokens if available; otherwise return the seconds until they will be."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        tokens = min(tokens, self.capacity)
+        if tokens <= 0 or self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    async def adjust(self, tokens):
+        """Charge (or refund, if negative) the difference from the estimate."""
+        self.tokens -= tokens
+
+
+class RedisTokenBucket:
+    """Tokens-per-minute bucket shared by every worker through Redis."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local requested = tonumber(ARGV[3])
+    -- Adjustments are always charged, leaving a negative balance to pay off
+    local charge = ARGV[4] == '1'
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local wait = 0
+    if charge or requested <= 0 or tokens >= requested then
+        tokens = tokens - requested
+    else
+        wait = (requested - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[1], 120)
+    return tostring(wait)
+    """
+
+    def __init__(self, redis_client, tokens_per_minute, key="llm-rate:tokens"):
+        self.redis_client = redis_client
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.key = key
+        self._script = redis_client.register_script(self.SCRIPT)
+
+    async def take(self, tokens):
+        wait = await self._script(keys=[self.key], args=[self.capacity, self.rate, min(tokens, self.capacity), 0])
+        return float(wait)
+
+    async def adjust(self, tokens):
+        """Charge (or refund, if negative) the difference from the estimate."""
+        await self._script(keys=[self.key], args=[self.capacity, self.rate, tokens, 1])
+
+
+class _Grant:
+    def __init__(self, scheduler, priority, estimated_tokens):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens = None
+        self.holding = True
+
+    def record_usage(self, total_tokens):
+        self.used_tokens = total_tokens
+
+    async def sleep_outside(self, delay):
+        """Give the concurrency slot back for delay seconds, such as a retry backoff, then queue for it again."""
+        self.scheduler._release()
+        self.holding = False
+        await asyncio.sleep(delay)
+        # The token budget was already charged for this call
+        await self.scheduler._acquire(self.priority, 0)
+        self.holding = True
+
+
+class LLMScheduler:
+    """Admits LLM calls by priority within a concurrency limit and a token budget.
+
+    Callers queue in priority order (then arrival order) and are admitted
+    while fewer than max_concurrency calls are in flight and the token
+    bucket can cover their estimated tokens. Once the call's real usage is
+    known the bucket is charged or refunded the difference. Callers that
+    wait longer than max_wait get GroqUnavailableError.
+    """
+
+    def __init__(self, max_concurrency=32, tokens_per_minute=0, max_wait=30.0):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters = []  # heap of (priority, sequence, tokens, future)
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+
+    def use_redis(self, redis_client):
+        """Share the token budget with other workers."""
+        if self.tokens_per_minute > 0:
+            self.bucket = RedisTokenBucket(redis_client, self.tokens_per_minute)
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "queued": len(self._waiters), "rejected": self.rejected}
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+    @asynccontextmanager
+    async def slot(self, method, estimated_tokens):
+        priority = PRIORITIES.get(method, 1)
+        await self._acquire(priority, estimated_tokens)
+        grant = _Grant(self, priority, estimated_tokens)
+        try:
+            yield grant
+        finally:
+            if grant.holding:
+                self._release()
+            if self.bucket and grant.used_tokens is not None:
+                try:
+                    await self.bucket.adjust(grant.used_tokens - estimated_tokens)
+                except Exception as e:
+                    logger.error("Error adjusting LLM token budget: %s", e)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wakeup.set()
+
+    async def _acquire(self, priority, tokens):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.rejected += 1
+                raise GroqUnavailableError("Timed out waiting for LLM capacity.")
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            elif not future.cancelled():
+                # Admitted just as the caller went away; give the slot back
+                self._release()
+            raise
+
+    async def _dispatch(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._waiters and self.in_flight < self.max_concurrency:
+                _, _, tokens, future = self._waiters[0]
+                if future.done():
+                    heapq.heappop(self._waiters)
+                    continue
+                if self.bucket:
+                    try:
+                        wait = await self.bucket.take(tokens)
+                    except Exception as e:
+                        logger.error("Error checking LLM token budget: %s", e)
+                        wait = 0.0
+                    if wait > 0:
+                        # Re-check the head afterwards: a higher priority call may have arrived
+                        await asyncio.sleep(wait)
+                        continue
+                heapq.heappop(self._waiters)
+                if future.done():
+                    if self.bucket:
+                        await self.bucket.adjust(-tokens)
+                    continue
+                self.in_flight += 1
+                future.set_result(None)
@@ -0,0 +1,169 @@
+"""Prometheus metrics and optional OpenTelemetry spans for conversation turns.
+
+Stages (LLM calls, Redis loads and saves, serialization) are timed with
+stage(), which observes a histogram labelled by stage, flow step and model
+and, once configure_tracing() has found OTEL_TRACING=true and
+opentelemetry installed, wraps the stage in a span. Streamed completions
+are timed with observe_stage() instead, since a span cannot stay open
+across the generator's yields. The flow step comes from current_step,
+which the conversation manager sets for each answer. Counters the
+services already keep (cache hits, fast-path hits, scheduler queue,
+conversation count) are read through their stats() methods when /metrics
+is scraped, so they cost nothing per request.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+current_step = ContextVar("current_step", default="")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "conversation_stage_seconds",
+    "Time spent in each stage of a turn.",
+    ["stage", "step", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+TURN_SECONDS = Histogram(
+    "conversation_turn_seconds",
+    "Time to handle one answer, or one batch of answers, end to end.",
+    ["step"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens reported in Groq response usage.",
+    ["method", "model", "kind"],
+)
+
+
+tracer = None
+
+
+def configure_tracing():
+    """Enable spans when OTEL_TRACING=true; call once the environment is loaded."""
+    global tracer
+    if os.getenv("OTEL_TRACING", "false").lower() != "true":
+        tracer = None
+        return
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("OTEL_TRACING is set but opentelemetry is not installed; spans are disabled")
+        return
+    tracer = trace.get_tracer("initial_api")
+
+
+def observe_stage(name, started, model=""):
+    """Record a stage that began at perf_counter() time started, without a span."""
+    STAGE_SECONDS.labels(name, current_step.get(), model).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def stage(name, model=""):
+    started = time.perf_counter()
+    if tracer is None:
+        try:
+            yield
+        finally:
+            observe_stage(name, started, model)
+        return
+    attributes = {"conversation.step": current_step.get(), "llm.model": model}
+    with tracer.start_as_current_span(name, attributes=attributes):
+        try:
+            yield
+        finally:
+            observe_stage(name, started, model)
+
+
+def record_usage(method, model, usage):
+    if usage is None:
+        return
+    LLM_TOKENS.labels(method, model, "prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels(method, model, "completion").inc(usage.completion_tokens or 0)
+
+
+class StatsCollector:
+    """Exposes the stats() counters of a ConversationManager and its services at scrape time."""
+
+    def __init__(self, conversation_manager):
+        self.conversation_manager = conversation_manager
+
+    def collect(self):
+        manager = self.conversation_manager
+        groq_service = manager.groq_service
+
+        cache = manager.conversations.stats()
+        conversations = GaugeMetricFamily("conversations_in_memory", "Conversations held in the local cache.")
+        conversations.add_metric([], cache["size"])
+        yield conversations
+        conversation_bytes = GaugeMetricFamily("conversations_in_memory_bytes", "Approximate size of the local cache.")
+        conversation_bytes.add_metric([], cache["bytes"])
+        yield conversation_bytes
+        cache_events = CounterMetricFamily(
+            "conversation_cache_events", "Local conversation cache events.", labels=["event"]
+        )
+        for event in ("evictions", "expirations", "hydrations"):
+            cache_events.add_metric([event], cache[event])
+        yield cache_events
+
+        if groq_service.cache:
+            llm_cache = CounterMetricFamily(
+                "llm_cache_lookups", "LLM response cache lookups by outcome.", labels=["method", "outcome"]
+            )
+            for method, counters in groq_service.cache.stats()["methods"].items():
+                for outcome, count in counters.items():
+                    llm_cache.add_metric([method, outcome], count)
+            yield llm_cache
+
+        if groq_service.grammar_fastpath:
+            fastpath = groq_service.grammar_fastpath.stats()
+            grammar = CounterMetricFamily(
+                "grammar_fastpath_lookups", "Answers corrected without (hit) or with (miss) the LLM.", labels=["outcome"]
+            )
+            grammar.add_metric(["hit"], fastpath["hits"])
+            grammar.add_metric(["miss"], fastpath["misses"])
+            yield grammar
+
+        scheduler = groq_service.scheduler.stats()
+        for name, help_text in (("in_flight", "LLM calls in flight."), ("queued", "LLM calls waiting for a slot.")):
+            gauge = GaugeMetricFamily(f"llm_scheduler_{name}", help_text)
+            gauge.add_metric([], scheduler[name])
+            yield gauge
+        rejected = CounterMetricFamily("llm_scheduler_rejected", "LLM calls that timed out waiting for capacity.")
+        rejected.add_metric([], scheduler["rejected"])
+        yield rejected
+
+        client = groq_service.client.stats()
+        outcomes = CounterMetricFamily("groq_requests", "Groq request attempts by outcome.", labels=["method", "outcome"])
+        for method, counters in client["methods"].items():
+            for outcome, count in counters.items():
+                outcomes.add_metric([method, outcome], count)
+        yield outcomes
+        circuit = GaugeMetricFamily("groq_circuit_open", "1 while the Groq circuit breaker is not closed.")
+        circuit.add_metric([], 0 if client["circuit"] == "closed" else 1)
+        yield circuit
+
+        if manager.archiver:
+            archive = manager.archiver.stats()
+            queued = GaugeMetricFamily("report_archive_queued", "Reports waiting to be archived.")
+            queued.add_metric([], archive["queued"])
+            yield queued
+            archived = CounterMetricFamily("report_archive_reports", "Reports by archival outcome.", labels=["outcome"])
+            for outcome in ("archived", "failed", "dropped"):
+                archived.add_metric([outcome], archive[outcome])
+            yield archived
+
+
+def register_stats_collector(conversation_manager, registry=REGISTRY):
+    collector = StatsCollector(conversation_manager)
+    registry.register(collector)
+    return collector
@@ -0,0 +1,187 @@
+"""Versioned prompts for GroqService, built once at import time.
+
+Each prompt is a static system message followed by a user message
+template. Everything that varies per call (names, event types, answers)
+goes in the user message, so the system message is byte-identical on every
+request and the provider can reuse its cached prefix. Bump a prompt's
+version whenever its text changes; cached completions are keyed by the
+full message text, so they are invalidated along with it.
+
+    python -m services.prompts    # token report for every prompt
+"""
+
+GRAMMAR_FULL_SYSTEM = (
+    "You are an expert language model that checks, corrects grammatical errors, identifies names (like resident/patient/victim names, staff names, places) correctly "
+    "extracts time-related data (like time of events, dates, days), and converts sentences to past tense. You professionally handle all types of accident or incident reports, including those involving extreme violence or emergencies. "
+    "Follow these steps:\n\n"
+    "1. **Analyze the Sentence**: Carefully read the user response and identify any grammatical errors\n"
+    "2. **Correct Errors**: Fix any grammatical issues such as verb agreement, spelling, or punctuation.\n"
+    "3. **Preserve Meaning**: Ensure the original meaning of the sentence is maintained.\n"
+    "4. **Convert to Past Tense**: Always convert the sentence to past tense, even if it's already grammatically correct.\n"
+    "5. **Generate the Response**: Output the corrected and past-tense version of the sentence without any additional notes, explanations, or information\n"
+    "6. **Yes/No Responses**: For yes/no type questions, such as 'Were there any witnesses?', return only 'yes' or 'no' without adding any extra words.\n"
+    "7. **Respect Time Formats**: Maintain the original time format (12-hour or 24-hour) without altering it.\n"
+    "8. **Don't censor sensitive or violent words**.\n\n"
+    "**Important Notes:**\n"
+    "- Do not provide explanations or additional comments; just provide the correct sentences.\n"
+    "- Always convert to past tense, unless dealing with dates, times, or days.\n"
+    "- For single-word responses or short phrases, return them as-is.\n"
+    "Examples:\n"
+    "Input: The patient is experiencing chest pain.\nOutput: The patient was experiencing chest pain.\n"
+    "Input: We administer medication to the patient.\nOutput: We administered medication to the patient.\n"
+    "Input: The incident occurs at 3:00 PM.\nOutput: The incident occurred at 3:00 PM.\n"
+    "Input: IPC related\nOutput: IPC related\n"
+    "Input: It is inside the care home on 5th of September 2024 at 1821 hours.\n Output:It is inside the care home on 5th of September 2024 at 18:21 hours\n"
+    "Input: In the patient's room, at 1500, on October 2, 2024.\n Output:In the patient's room, at 15:00, on October 2, 2024.\n"
+    "Input: In the patient's room, on October 2, 2024 at 16134, on October 2, 2024.\n Output:In the patient's room, on October 2, 2024 at 16:34\n"
+    "Input: In the patient's room, on October 2, 2024 at 16134 .\n Output:In the patient's room, on October 2, 2024 at 16:34\n"
+    "Input: missing person\nOutput: missing person\n"
+    "Input: self harm\nOutput: self harm\n"
+    "Input: physical assault\nOutput: physical assault\n"
+    "Input: medication\nOutput: medication\n"
+    "Input: environmental\nOutput: environmental\n"
+    "Input: near miss\nOutput: near miss\n"
+    "Input: absconding\nOutput: absconding\n"
+    "Input: skin integrity\nOutput: skin integrity\n"
+    "Input: was skin integrity\nOutput: skin integrity\n"
+    "Input: fall\nOutput: fall\n"
+    "Input: behaviour\nOutput: behaviour\n"
+)
+
+# The same rules with only the examples that teach something the rules do not.
+# Event type names and yes/no answers are handled by GrammarFastPath before
+# the LLM is called, so their examples are dropped.
+GRAMMAR_LEAN_SYSTEM = (
+    "You correct answers written for care home incident reports. "
+    "Fix grammar, spelling and punctuation, keep names, places and the original meaning unchanged, "
+    "and convert sentences to past tense except for dates, times and days. "
+    "Keep the original 12-hour or 24-hour time format, writing run-together times like 1821 as 18:21. "
+    "Answer yes/no questions with only 'yes' or 'no'. Return single words and short phrases as-is. "
+    "Don't censor sensitive or violent words. "
+    "Output only the corrected text, with no notes or explanations.\n"
+    "Examples:\n"
+    "Input: The patient is experiencing chest pain.\nOutput: The patient was experiencing chest pain.\n"
+    "Input: In the patient's room, at 1500, on October 2, 2024.\nOutput: In the patient's room, at 15:00, on October 2, 2024.\n"
+    "Input: IPC related\nOutput: IPC related\n"
+)
+
+EVENT_ANALYSIS_SYSTEM = (
+    "You are an expert in healthcare and injury risk assessment. Analyze the event "
+    "description for three aspects:\n\n"
+    "1. Injury Risk Assessment: Determine if there's any possibility of physical injury\n"
+    "2. Injury Mention Detection: Check if injury is explicitly or implicitly mentioned\n"
+    "   - Explicit mentions: bruise, cut, wound, injury, pain, etc.\n"
+    "   - Implicit mentions: bleeding, swelling, redness, limping, unable to move, etc.\n"
+    "   - Physical symptoms: marks, discoloration, difficulty moving, etc.\n"
+    "3. Event Classification: Determine if this is an incident or accident\n\n"
+    "Respond with a single JSON object with exactly these keys:\n"
+    "{\"has_injury_risk\": true/false, "
+    "\"risk_percentage\": number 0-100, "
+    "\"risk_reasoning\": brief explanation, "
+    "\"injury_mentioned\": true/false, "
+    "\"mention_details\": injury-related terms found, or \"None found\", "
+    "\"classification\": \"accident\" or \"incident\", "
+    "\"classification_reason\": brief explanation}\n"
+    "Classify as accident if there is any injury/physical injury, otherwise as incident.\n\n"
+    "Examples:\n"
+    "'Resident fell and has a bruise' -> injury_mentioned: true (explicit mention of bruise)\n"
+    "'Resident's arm is red and swollen' -> injury_mentioned: true (implicit - symptoms described)\n"
+    "'Resident nearly fell but was caught' -> injury_mentioned: false (no injury described)\n"
+    "'Resident seems uncomfortable moving' -> injury_mentioned: true (implicit - physical symptom)\n"
+    "'Resident refused medication' -> injury_mentioned: false (no physical symptoms described)"
+)
+
+# Resident, staff and event type used to be interpolated here; they now come
+# in the user message so this prefix never changes between reports.
+SUMMARY_SYSTEM = (
+    "You are an expert in writing accurate and professional incident reports for care homes."
+    "Your task is to generate a report based on the context provided by the user in a question-and-answer format. "
+    "Analyze the user's responses to identify specific action-related keywords or phrases that describe the nature of the event, including the part of the body involved in any injury. "
+    "Focus on extracting these keywords directly from the user's narrative without inferring, assuming, or adding any information that was not explicitly mentioned by the user.\n"
+    "The report must be descriptive and structured as follows:\n"
+    "1. **Title of the event**: Start from the event type given by the user - Provide a clear, concise title using the exact words provided by the user. Include the part of the body involved if mentioned. Do not add any inferred terms.\n"
+    "2. **Descriptive Summary**: Craft a detailed paragraph explaining the incident in a narrative form using only the user's words. Ensure the description is context-specific, including the time, location, and all individuals involved (e.g., the resident, the staff member, and any other people mentioned in the responses), actions taken, medical terms, and the part of the body involved in any injury if explicitly stated. **Do not infer any injuries, actions, or other details not explicitly stated by the user**.\n"
+    "3. **Key Findings**: Summarize the main facts using only the user's responses. Extract key elements such as location, actions, individuals involved (the resident, the staff member, and others), medical observations, and the part of the body injured. **Do not add or infer any details**. Bold important facts and findings.\n"
+    "4. **Action Taken**: Describe any actions taken based on the user's input. Highlight any immediate responses or follow-up actions, using only the actions described by the user. **Do not add any details that were not provided**.\n"
+    "5. **Don't censor sensitive or violent words**.\n"
+    "6. **Maintain Clarity**: Use professional language that directly reflects the event's seriousness or nature, ensuring that the title and report reflect the user's exact input without inferring any additional information.\n"
+    "Ensure that no information is inferred or added that is not explicitly stated in the user's input. All findings, actions, and recommendations should be based strictly on the provided context, and any relevant words should be bolded for emphasis."
+)
+
+
+class Prompt:
+    __slots__ = ("name", "variant", "version", "system", "user_template", "model", "temperature")
+
+    def __init__(self, name, variant, version, system, user_template, model="llama-3.3-70b-versatile", temperature=0.2):
+        self.name = name
+        self.variant = variant
+        self.version = version
+        self.system = system
+        self.user_template = user_template
+        self.model = model
+        self.temperature = temperature
+
+    @property
+    def id(self):
+        return f"{self.name}:{self.variant}:v{self.version}"
+
+    def messages(self, **values) -> list:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user_template.format(**values)},
+        ]
+
+
+PROMPTS = {
+    (prompt.name, prompt.variant): prompt
+    for prompt in (
+        Prompt("check_grammar", "full", 1, GRAMMAR_FULL_SYSTEM, "{text}", temperature=0.5),
+        Prompt("check_grammar", "lean", 1, GRAMMAR_LEAN_SYSTEM, "{text}", temperature=0.5),
+        Prompt(
+            "event_analysis", "full", 2, EVENT_ANALYSIS_SYSTEM,
+            "Please analyze this event description: {event_details}", temperature=0.1
+        ),
+        Prompt(
+            "summarize_scenario", "full", 2, SUMMARY_SYSTEM,
+            "Please provide a descriptive summary of the following {scenario_type} involving {event_type} "
+            "for resident: {resident_name}, reported with staff member: {staff}, "
+            "from the provided context:\n{description}",
+            temperature=0.2
+        ),
+    )
+}
+
+
+def get_prompt(name, variant="full"):
+    try:
+        return PROMPTS[(name, variant)]
+    except KeyError:
+        variants = sorted(v for n, v in PROMPTS if n == name)
+        raise ValueError(f"Unknown prompt variant '{variant}' for {name}; expected one of {variants}") from None
+
+
+def count_tokens(text):
+    """Count tokens with tiktoken when it is installed, else estimate at four characters per token."""
+    try:
+        import tiktoken
+    except ImportError:
+        return len(text) // 4
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def token_report() -> list:
+    return [
+        {
+            "prompt": prompt.id,
+            "system_chars": len(prompt.system),
+            "system_tokens": count_tokens(prompt.system),
+            "template_tokens": count_tokens(prompt.user_template),
+        }
+        for prompt in PROMPTS.values()
+    ]
+
+
+if __name__ == "__main__":
+    print(f"{'prompt':<32} {'chars':>7} {'system tokens':>14} {'template tokens':>16}")
+    for row in token_report():
+        print(f"{row['prompt']:<32} {row['system_chars']:>7} {row['system_tokens']:>14} {row['template_tokens']:>16}")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+
+from services.conversation_flow import DEFAULT_FLOW_ID, FLOWS
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+def mongodb_configured():
+    return bool(os.getenv("MONGODB_URI")) or os.getenv("MONGODB_MOCK", "false").lower() == "true"
+
+
+def utc_naive(value):
+    """MongoDB stores naive UTC datetimes; naive inputs are taken to be UTC already."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return utc_naive(datetime.fromisoformat(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_event_type(value):
+    """Lower-case and tidy an event type, so the archive and its filter agree on "Fall" and "fall."."""
+    if not isinstance(value, str):
+        return value
+    return " ".join(value.split()).strip(" .").lower() or None
+
+
+def report_document(conversation_id, conversation, status):
+    """Build the archived report for a conversation, copying everything a later turn could change."""
+    flow = FLOWS.get(conversation.get("flow", DEFAULT_FLOW_ID))
+    event_step = flow.step("event_type") if flow else None
+    responses = dict(conversation.get("responses", {}))
+    archived_at = utc_naive(datetime.now(timezone.utc))
+    return {
+        "_id": conversation_id,
+        "resident_id": conversation.get("resident_id"),
+        "resident_name": conversation.get("resident_name"),
+        "event_type": normalize_event_type(responses.get(event_step.question)) if event_step else None,
+        "scenario_type": conversation.get("scenario_type"),
+        "status": status,
+        "responses": responses,
+        "analysis": dict(conversation["analysis"]) if conversation.get("analysis") else None,
+        "summary": conversation.get("summary"),
+        "flow": conversation.get("flow", DEFAULT_FLOW_ID),
+        "created_at": _parse_time(conversation.get("created_at")) or archived_at,
+        "archived_at": archived_at,
+    }
+
+
+class ReportArchiver:
+    """Write-behind archival of finished conversations to MongoDB.
+
+    enqueue() only appends to a bounded in-memory queue, so the request
+    path never waits on MongoDB. A background task drains the queue in
+    batches of up to flush_size, or whatever has arrived after
+    flush_interval seconds, and writes each batch with one insert_many.
+    Reports archived again (for example after the summary is regenerated)
+    replace the earlier copy. Failed batches are retried with backoff.
+    """
+
+    def __init__(self, collection_factory, flush_size=100, flush_interval=5.0, max_queue=10000, max_attempts=3):
+        self.collection_factory = collection_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.collection = None
+        self.archived = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = None
+
+    @classmethod
+    def from_env(cls):
+        """Return an archiver when MongoDB (or its mock) is configured, else None."""
+        if os.getenv("REPORT_ARCHIVE", "true").lower() != "true" or not mongodb_configured():
+            return None
+
+        def collection():
+            # pymongo is only imported once archiving is enabled, keeping API startup lean
+            from database import reports_collection
+            return reports_collection()
+
+        return cls(
+            collection,
+            flush_size=int(os.getenv("REPORT_ARCHIVE_FLUSH_SIZE", "100")),
+            flush_interval=float(os.getenv("REPORT_ARCHIVE_FLUSH_INTERVAL", "5")),
+            max_queue=int(os.getenv("REPORT_ARCHIVE_MAX_QUEUE", "10000")),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "archived": self.archived,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, document):
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error("Report archive queue is full, dropping report %s", document["_id"])
+
+    async def close(self):
+        """Flush everything queued so far and stop the writer."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            document = await self._queue.get()
+            if document is None:
+                break
+            batch = [document]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                try:
+                    document = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if document is None:
+                    stopping = True
+                    break
+                batch.append(document)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        # Later copies of the same report supersede earlier ones
+        documents = list({document["_id"]: document for document in batch}.values())
+        for attempt in range(self.max_attempts):
+            try:
+                await asyncio.to_thread(self._write, documents)
+                self.archived += len(documents)
+                return
+            except Exception as e:
+                logger.error("Error archiving %d reports (attempt %d): %s", len(documents), attempt + 1, e)
+                if attempt + 1 < self.max_attempts:
+                    await asyncio.sleep(min(2 ** attempt, 30))
+        self.failed += len(documents)
+
+    def _write(self, documents):
+        from pymongo.errors import BulkWriteError
+
+        if self.collection is None:
+            self.collection = self.collection_factory()
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY for error in errors):
+                raise
+            for error in errors:
+                document = documents[error["index"]]
+                self.collection.replace_one({"_id": document["_id"]}, document, upsert=True)
@@ -0,0 +1,127 @@
+import asyncio
+import base64
+import json
+from datetime import datetime
+
+from services.report_archiver import mongodb_configured, normalize_event_type, utc_naive
+
+# Every list query filters on equality fields and pages by (created_at, _id) descending,
+# so each index puts its equality fields first and the sort keys last.
+INDEXES = [
+    [("resident_id", 1), ("created_at", -1), ("_id", -1)],
+    [("event_type", 1), ("analysis.classification", 1), ("created_at", -1), ("_id", -1)],
+    [("analysis.classification", 1), ("created_at", -1), ("_id", -1)],
+    [("scenario_type", 1), ("created_at", -1), ("_id", -1)],
+    [("created_at", -1), ("_id", -1)],
+]
+
+# List views never load responses or the summary
+LIST_PROJECTION = {
+    "resident_id": 1,
+    "resident_name": 1,
+    "event_type": 1,
+    "scenario_type": 1,
+    "status": 1,
+    "analysis.classification": 1,
+    "created_at": 1,
+}
+
+FILTER_FIELDS = {
+    "resident_id": "resident_id",
+    "event_type": "event_type",
+    "scenario_type": "scenario_type",
+    "classification": "analysis.classification",
+    "status": "status",
+}
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(document):
+    payload = json.dumps([utc_naive(document["created_at"]).isoformat(), document["_id"]])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, report_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), report_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor.") from e
+
+
+class ReportQueries:
+    """Read access to archived reports, with keyset pagination newest first.
+
+    Pages are resumed from an opaque cursor holding the last report's
+    (created_at, _id), so each page is an index range scan no matter how
+    deep the client pages. pymongo is blocking, so queries run in a thread.
+    """
+
+    def __init__(self, collection_factory):
+        self.collection_factory = collection_factory
+        self._collection = None
+
+    @classmethod
+    def from_env(cls):
+        """Return the query service when MongoDB (or its mock) is configured, else None."""
+        if not mongodb_configured():
+            return None
+
+        def collection():
+            from database import reports_collection
+            return reports_collection()
+
+        return cls(collection)
+
+    def collection(self):
+        if self._collection is None:
+            collection = self.collection_factory()
+            for keys in INDEXES:
+                collection.create_index(keys)
+            self._collection = collection
+        return self._collection
+
+    async def list_reports(self, filters, date_from=None, date_to=None, cursor=None, limit=20):
+        """Return (reports, next_cursor) for the reports matching every given filter."""
+        filters = {**filters, "event_type": normalize_event_type(filters.get("event_type"))}
+        query = {FILTER_FIELDS[name]: value for name, value in filters.items() if value is not None}
+        conditions = [query]
+        created_at = {}
+        if date_from is not None:
+            created_at["$gte"] = utc_naive(date_from)
+        if date_to is not None:
+            created_at["$lt"] = utc_naive(date_to)
+        if created_at:
+            conditions.append({"created_at": created_at})
+        if cursor:
+            last_created_at, last_id = decode_cursor(cursor)
+            conditions.append({"$or": [
+                {"created_at": {"$lt": last_created_at}},
+                {"created_at": last_created_at, "_id": {"$lt": last_id}},
+            ]})
+        if len(conditions) > 1:
+            query = {"$and": conditions}
+
+        def find():
+            return list(
+                self.collection()
+                .find(query, LIST_PROJECTION)
+                .sort([("created_at", -1), ("_id", -1)])
+                .limit(limit + 1)
+            )
+
+        documents = await asyncio.to_thread(find)
+        next_cursor = encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+        return [_report(document) for document in documents[:limit]], next_cursor
+
+    async def get_report(self, report_id):
+        document = await asyncio.to_thread(lambda: self.collection().find_one({"_id": report_id}))
+        return _report(document) if document else None
+
+
+def _report(document):
+    document["conversation_id"] = document.pop("_id")
+    return document
@@ -0,0 +1,98 @@
+import json
+
+# Version of the stored conversation layout. Bump it when the shape of the
+# stored fields changes, and teach decode_fields to upgrade older versions.
+SCHEMA_VERSION = 1
+
+# Serialized values start with HEADER_MARKER, the schema version and the
+# format id. Values without the marker are plain JSON written before the
+# header existed and are read as schema version 0.
+HEADER_MARKER = b"\x00"
+
+
+class JSONSerializer:
+    format_id = 0
+    name = "json"
+
+    def dumps(self, value) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    def loads(self, payload: bytes):
+        return json.loads(payload)
+
+
+class OrjsonSerializer:
+    format_id = 1
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, value) -> bytes:
+        return self._orjson.dumps(value)
+
+    def loads(self, payload: bytes):
+        return self._orjson.loads(payload)
+
+
+class MsgpackSerializer:
+    format_id = 2
+    name = "msgpack"
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, payload: bytes):
+        return self._msgpack.unpackb(payload, raw=False)
+
+
+SERIALIZERS = {
+    JSONSerializer.name: JSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+class VersionedSerializer:
+    """Writes values in one format with a schema-version header and reads any format."""
+
+    def __init__(self, name="json"):
+        if name not in SERIALIZERS:
+            raise ValueError(f"Unknown serializer: {name}")
+        self.serializer = SERIALIZERS[name]()
+        self.header = HEADER_MARKER + bytes([SCHEMA_VERSION, self.serializer.format_id])
+        self._readers = {self.serializer.format_id: self.serializer}
+
+    @property
+    def name(self):
+        return self.serializer.name
+
+    def dumps(self, value) -> bytes:
+        return self.header + self.serializer.dumps(value)
+
+    def loads(self, data):
+        """Return (value, schema_version) for a value written in any supported format."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if data[:1] != HEADER_MARKER:
+            return json.loads(data), 0
+        schema_version, format_id = data[1], data[2]
+        if schema_version > SCHEMA_VERSION:
+            raise ValueError(f"Unsupported conversation schema version: {schema_version}")
+        return self._reader(format_id).loads(data[3:]), schema_version
+
+    def _reader(self, format_id):
+        reader = self._readers.get(format_id)
+        if reader is None:
+            for serializer_class in SERIALIZERS.values():
+                if serializer_class.format_id == format_id:
+                    reader = self._readers[format_id] = serializer_class()
+                    break
+            else:
+                raise ValueError(f"Unknown serializer format: {format_id}")
+        return reader
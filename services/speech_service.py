@@ -1,16 +1,16 @@
-import azure.cognitiveservices.speech as speechsdk
 import time
 import os
 import re
 import threading
-from services.ui_helpers import display_chat_message
-import streamlit as st
+from contextlib import nullcontext
 from services.api_service import fetch_user_transcript , fetch_is_speaking
-
-from load_azure_sdk import load_azure_speech_sdk, load_azure_synthetic_speech_sdk
+from services.transcript_events import TranscriptEvents
 
 class SpeechService:
     def __init__(self, conversation_manager, conversation_id):
+        # The Azure SDK is only loaded once a voice session is actually created
+        import azure.cognitiveservices.speech as speechsdk
+
         self.speech_config = speechsdk.SpeechConfig(
             subscription=os.getenv("AZURE_SPEECH_KEY"),
             region=os.getenv("AZURE_SPEECH_REGION")
@@ -39,6 +39,8 @@ class SpeechService:
         self.is_recognizing = False  
         self.conversation_manager = conversation_manager
         self.conversation_id = conversation_id
+        # Wait for transcript updates over Redis pub/sub; polling is the fallback
+        self.transcript_events = TranscriptEvents.from_env()
 
         # self.speech_recognizer.recognizing.connect(self.recognizing_callback)
         # self.speech_recognizer.recognized.connect(self.recognized_callback)
@@ -88,6 +90,7 @@ class SpeechService:
         self.last_recognition_time = time.time()
         self.session_started_handler()
         
+        from load_azure_sdk import load_azure_speech_sdk
         load_azure_speech_sdk(self.conversation_id)
         
         # Start continuous recognition in a new thread
@@ -95,10 +98,29 @@ class SpeechService:
         # recognition_thread.start()
         return self._continuous_recognition_loop()
 
+    def _transcript_subscription(self):
+        if self.transcript_events is None:
+            return nullcontext()
+        return self.transcript_events.subscribe(self.conversation_id)
+
     def _continuous_recognition_loop(self):
         self.is_recognizing = True
         full_text = ""
-        
+
+        with self._transcript_subscription() as subscription:
+            if subscription is not None:
+                event = subscription.wait(
+                    lambda event: event.get("text", "") != "",
+                    self.transcript_events.timeout,
+                    current=lambda: fetch_user_transcript(self.conversation_id),
+                    poll_interval=self.transcript_events.poll_interval(0.25)
+                )
+                if event is not None:
+                    full_text = event["text"]
+                    self.recognized_callback(full_text)
+                    self.stop_speech_recognition()
+                    return full_text
+
         while self.is_recognizing and (full_text == "" or full_text is not None):
             time.sleep(0.25)  # Call the function every second
             ut = fetch_user_transcript(self.conversation_id)
@@ -129,6 +151,9 @@ class SpeechService:
             print(self.status_message)
 
     def synthesize_speech(self, text: str):
+        from services.ui_helpers import display_chat_message
+        from load_azure_sdk import load_azure_synthetic_speech_sdk
+
         cleaned_text = self.clean_text(text)
         display_chat_message(is_user=False, message_text=cleaned_text)
         
@@ -139,7 +164,19 @@ class SpeechService:
         #     args=(cleaned_text, synthesis_complete)
         # )
         # synthesis_thread.start()
-        load_azure_synthetic_speech_sdk(text, self.conversation_id)
+        with self._transcript_subscription() as subscription:
+            # Subscribe first so the end of a short utterance is not missed
+            load_azure_synthetic_speech_sdk(text, self.conversation_id)
+            # The speaking flag is only set once playback starts, so the stored
+            # state is first checked after one poll interval, as the loop below does
+            if subscription is not None and subscription.wait(
+                lambda event: event.get("is_speaking") is False,
+                self.transcript_events.timeout,
+                current=lambda: fetch_is_speaking(self.conversation_id),
+                poll_interval=self.transcript_events.poll_interval(2),
+                check_first=False
+            ):
+                return True
         # while not synthesis_complete.is_set():
         #     time.sleep(0.1)
         
@@ -0,0 +1,121 @@
+"""JSON-lines logging that keeps formatting and stdout writes off the request path.
+
+configure_logging() routes every record through a QueueHandler: the
+calling thread only resolves the message and enqueues it, and a
+QueueListener thread encodes it as one JSON object per line and writes it
+to stdout. Each record carries the conversation_id and flow step of the
+request that logged it, taken from context variables set by the
+conversation manager.
+
+User-supplied text is only logged through log_payload(), which logs at
+DEBUG for a sampled fraction of calls (LOG_PAYLOAD_SAMPLE_RATE) and
+replaces the text with its length unless LOG_RESPONSE_TEXT=true.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from services.metrics import current_step
+
+current_conversation = ContextVar("current_conversation", default=None)
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+# Set from the environment by configure_logging()
+payload_sample_rate = 0.01
+log_response_text = False
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the conversation and step of the task that logged them."""
+
+    def filter(self, record):
+        record.conversation_id = current_conversation.get()
+        record.step = current_step.get() or None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback while they are still valid, but
+        # leave the JSON encoding to the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+_listener = None
+
+
+def configure_logging():
+    """Install the queued handler on the root logger; safe to call more than once.
+
+    LOG_LEVEL sets the root level (INFO by default) and LOG_FORMAT=text
+    writes plain lines instead of JSON.
+    """
+    global _listener, payload_sample_rate, log_response_text
+    if _listener is not None:
+        return
+    payload_sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+    log_response_text = os.getenv("LOG_RESPONSE_TEXT", "false").lower() == "true"
+
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        output.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    else:
+        output.setFormatter(JSONFormatter())
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def redact(text):
+    return text if log_response_text or not isinstance(text, str) else f"<{len(text)} chars>"
+
+
+def log_payload(logger, message, **payload):
+    """Log user-supplied text at DEBUG for a sample of calls, redacted by default."""
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= payload_sample_rate:
+        return
+    logger.debug(message, extra={"payload": {key: redact(value) for key, value in payload.items()}})
@@ -0,0 +1,127 @@
+"""Push delivery of voice transcript updates over Redis pub/sub.
+
+Whatever stores a conversation's transcript or speaking status publishes
+the new state as JSON ({"conversation_id", "text"} or {"conversation_id",
+"is_speaking"}) on that conversation's channel. SpeechService subscribes
+and wakes as soon as the update it is waiting for arrives, instead of
+sleeping between polls. wait() also re-reads the stored state every
+poll interval as a safety net. When this app serves the transcript
+routes every update is published, so that re-read is slow
+(TRANSCRIPT_SAFETY_POLL_SECONDS); when push is forced on for an external
+service that may never publish, callers keep their usual polling rate,
+so it costs no more than polling would. It returns None
+when push delivery is not available or times out, so callers can fall
+back to polling.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "voice-transcript:"
+
+
+def channel(conversation_id):
+    return f"{CHANNEL_PREFIX}{conversation_id}"
+
+
+async def publish_transcript_event(redis_client, conversation_id, event):
+    """Publish a transcript update from async code; failures are logged, not raised."""
+    try:
+        await redis_client.publish(channel(conversation_id), json.dumps({"conversation_id": conversation_id, **event}))
+    except Exception as e:
+        logger.error("Error publishing transcript event: %s", e)
+
+
+class TranscriptSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def wait(self, predicate, timeout, current=None, poll_interval=None, check_first=True):
+        """Block until an event or the stored state satisfies predicate; return it, or None on timeout.
+
+        current, if given, returns the stored state. It is checked right
+        after subscribing (unless check_first is False), so updates that
+        landed before the subscription are not missed, and again whenever
+        poll_interval seconds pass without a matching event.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            if current is not None and check_first:
+                state = current()
+                if predicate(state):
+                    return state
+            next_poll = time.monotonic() + poll_interval if current is not None and poll_interval else None
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return None
+                if next_poll is not None and now >= next_poll:
+                    state = current()
+                    if predicate(state):
+                        return state
+                    next_poll = now + poll_interval
+                wake = deadline if next_poll is None else min(deadline, next_poll)
+                message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=wake - now)
+                if message is None or message["type"] != "message":
+                    continue
+                event = json.loads(message["data"])
+                if predicate(event):
+                    return event
+        except (redis.RedisError, ValueError) as e:
+            logger.error("Error waiting for transcript event: %s", e)
+            return None
+
+
+class TranscriptEvents:
+    """Synchronous subscriber for SpeechService, which runs outside the event loop."""
+
+    def __init__(self, redis_url=None, timeout=None, safety_poll_interval=None):
+        self.redis_client = redis.from_url(redis_url or os.getenv("REDIS_URL"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("TRANSCRIPT_PUSH_TIMEOUT", "30"))
+        # Seconds between re-reads of the stored state when updates are known to be
+        # published; None when they may not be, so callers poll at their usual rate
+        self.safety_poll_interval = safety_poll_interval
+
+    def poll_interval(self, default):
+        return self.safety_poll_interval or default
+
+    @classmethod
+    def from_env(cls):
+        """Return a subscriber when push delivery is enabled and Redis is configured, else None.
+
+        TRANSCRIPT_PUSH defaults to on only when this app serves the
+        transcript routes, since an external transcript service does not
+        publish updates.
+        """
+        from services.api_service import _is_local
+
+        push = os.getenv("TRANSCRIPT_PUSH")
+        local = _is_local((os.getenv("VOICE_TRANSCRIPT_API_ENDPOINT") or "").rstrip("/"))
+        enabled = local if push is None else push.lower() == "true"
+        if not enabled or not os.getenv("REDIS_URL"):
+            return None
+        return cls(safety_poll_interval=float(os.getenv("TRANSCRIPT_SAFETY_POLL_SECONDS", "5")) if local else None)
+
+    @contextmanager
+    def subscribe(self, conversation_id):
+        """Subscribe to a conversation's updates; yields None if Redis is unreachable."""
+        try:
+            pubsub = self.redis_client.pubsub()
+            pubsub.subscribe(channel(conversation_id))
+        except redis.RedisError as e:
+            logger.error("Error subscribing to transcript events: %s", e)
+            yield None
+            return
+        try:
+            yield TranscriptSubscription(pubsub)
+        finally:
+            pubsub.close()
+
+    def close(self):
+        self.redis_client.close()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from services.transcript_events import publish_transcript_event
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptStore:
+    """Per-conversation voice transcript and speaking status, kept for a limited time.
+
+    Entries live in a bounded in-process LRU with a TTL, or in Redis hashes
+    when use_redis has been called so every worker sees the same state.
+    With Redis, updates are also published for SpeechService to wake on.
+    If a Redis call fails the in-process entry is used instead.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_client = None
+        self.loop = None
+        self._entries = OrderedDict()  # conversation_id -> [expires_at, text, is_speaking]
+
+    def use_redis(self, redis_client):
+        self.redis_client = redis_client
+
+    @staticmethod
+    def key(conversation_id):
+        return f"transcript:{conversation_id}"
+
+    def _entry(self, conversation_id):
+        entry = self._entries.get(conversation_id)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[conversation_id]
+            entry = None
+        if entry is None:
+            entry = [0.0, "", False]
+            self._entries[conversation_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(conversation_id)
+        entry[0] = time.monotonic() + self.ttl
+        return entry
+
+    async def _write(self, conversation_id, field, value):
+        self._entry(conversation_id)[1 if field == "text" else 2] = value
+        if self.redis_client:
+            key = self.key(conversation_id)
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.hset(key, field, value if field == "text" else int(value))
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error("Error writing transcript to Redis: %s", e)
+
+    async def _read(self, conversation_id):
+        if self.redis_client:
+            try:
+                fields = await self.redis_client.hgetall(self.key(conversation_id))
+                return fields.get(b"text", b"").decode("utf-8"), fields.get(b"is_speaking", b"0") == b"1"
+            except Exception as e:
+                logger.error("Error reading transcript from Redis: %s", e)
+        _, text, is_speaking = self._entry(conversation_id)
+        return text, is_speaking
+
+    async def set_text(self, conversation_id, text):
+        await self._write(conversation_id, "text", text)
+        if self.redis_client:
+            await publish_transcript_event(self.redis_client, conversation_id, {"text": text})
+        return {"conversation_id": conversation_id, "text": text}
+
+    async def get_text(self, conversation_id):
+        text, _ = await self._read(conversation_id)
+        return {"conversation_id": conversation_id, "text": text}
+
+    async def reset_text(self, conversation_id):
+        await self._write(conversation_id, "text", "")
+        return {"conversation_id": conversation_id, "text": ""}
+
+    async def set_speaking(self, conversation_id, is_speaking):
+        await self._write(conversation_id, "is_speaking", is_speaking)
+        if self.redis_client:
+            await publish_transcript_event(self.redis_client, conversation_id, {"is_speaking": is_speaking})
+        return {"conversation_id": conversation_id, "is_speaking": is_speaking}
+
+    async def get_speaking(self, conversation_id):
+        _, is_speaking = await self._read(conversation_id)
+        return {"conversation_id": conversation_id, "is_speaking": is_speaking}
+
+
+_local_store = None
+
+
+def register_local_store(store):
+    """Make the store that serves this process's transcript routes callable in-process.
+
+    Must be called from the event loop the routes run on.
+    """
+    global _local_store
+    store.loop = asyncio.get_running_loop()
+    _local_store = store
+
+
+def local_store():
+    return _local_store